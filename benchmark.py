@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Banc d'essai des solveurs
+-------------------------
+Génère des jeux d'actions synthétiques reproductibles (graine, n, loi des
+coûts, corrélation coût/rendement, budget), lance chaque solveur enregistré
+dans SOLVERS, puis enregistre temps, pic mémoire et accord des résultats.
+
+Chaque mesure tourne dans un processus enfant (instance régénérée à partir de
+la graine, hors chronomètre) : le pic mémoire est le max RSS de l'enfant moins
+son RSS de départ, et un --timeout peut interrompre un solveur trop lent.
+
+Usage:
+    python benchmark.py [--suite quick|full] [--solvers a,b] [--repeat 3]
+                        [--output resultats.json] [--baseline base.json --threshold 0.25]
+                        [--write-csv dossier]
+
+Avec --baseline, toute mesure plus lente que la base de plus de --threshold
+(25 % par défaut) est signalée et le code de sortie vaut 1.
+"""
+
+import argparse
+import csv
+import json
+import math
+import multiprocessing as mp
+import platform
+import random
+import time
+import tracemalloc
+from array import array
+from pathlib import Path
+from typing import Dict, List
+
+import bruteforce
+import comparison_results
+import optimized
+from stock_loader import StockColumns
+
+# ======================
+# Générateur d'instances
+# ======================
+COST_DISTRIBUTIONS = ("uniform", "lognormal")
+
+def generate_stocks(n: int, seed: int, cost_dist: str = "uniform", correlation: float = 0.0,
+                    min_cost: float = 1.0, max_cost: float = 100.0,
+                    mean_return: float = 20.0, spread_return: float = 10.0) -> StockColumns:
+    """Jeu d'actions synthétique reproductible.
+
+    correlation (entre -1 et 1) relie le rendement en % au coût : 0 = indépendant,
+    1 = les actions chères rapportent le plus, -1 = l'inverse. Les rendements sont
+    bornés à [0.01 %, mean_return + 3 * spread_return].
+    """
+    if cost_dist not in COST_DISTRIBUTIONS:
+        raise ValueError(f"loi de coût inconnue: {cost_dist}")
+    rng = random.Random(seed)
+    if cost_dist == "uniform":
+        costs = [rng.uniform(min_cost, max_cost) for _ in range(n)]
+    else:
+        mu = math.log((min_cost + max_cost) / 4)
+        costs = [min(max_cost, max(min_cost, rng.lognormvariate(mu, 0.8))) for _ in range(n)]
+    mean = sum(costs) / n if n else 0.0
+    std = math.sqrt(sum((c - mean) ** 2 for c in costs) / n) if n else 0.0
+    noise_weight = math.sqrt(max(0.0, 1.0 - correlation ** 2))
+
+    cols = StockColumns([], array("q"), array("q"), array("d"))
+    for i, cost in enumerate(costs):
+        z = (cost - mean) / std if std else 0.0
+        percent = mean_return + spread_return * (correlation * z + noise_weight * rng.gauss(0.0, 1.0))
+        percent = round(min(max(percent, 0.01), mean_return + 3 * spread_return), 2)
+        cost = round(cost, 2)
+        cols.names.append(f"Synth-{i:06d}")
+        cols.cost_cents.append(int(round(cost * 100)))
+        cols.profit_cents.append(max(1, int(round(cost * (percent / 100.0) * 100))))
+        cols.percent.append(percent)
+    return cols
+
+def write_csv(cols: StockColumns, path: Path) -> None:
+    """Écrit l'instance au format des datasets (name, price, profit en %)."""
+    with Path(path).open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "price", "profit"])
+        for name, cost, percent in zip(cols.names, cols.cost_cents, cols.percent):
+            writer.writerow([name, f"{cost / 100:.2f}", f"{percent:.2f}"])
+
+# Cas : (nom, n, graine, loi des coûts, corrélation, budget en €)
+SUITES = {
+    "quick": [
+        ("n15-uncorr", 15, 1, "uniform", 0.0, 200.0),
+        ("n30-corr", 30, 2, "uniform", 0.9, 300.0),
+        ("n200-lognorm", 200, 3, "lognormal", 0.3, 100.0),
+        ("n1000-uncorr", 1000, 4, "uniform", 0.0, 500.0),
+    ],
+    "full": [
+        ("n15-uncorr", 15, 1, "uniform", 0.0, 200.0),
+        ("n20-inverse", 20, 5, "uniform", -0.7, 250.0),
+        ("n36-corr", 36, 2, "uniform", 0.9, 300.0),
+        ("n200-lognorm", 200, 3, "lognormal", 0.3, 100.0),
+        ("n1000-uncorr", 1000, 4, "uniform", 0.0, 500.0),
+        ("n1000-corr", 1000, 6, "uniform", 0.95, 500.0),
+        ("n1000-big-budget", 1000, 7, "lognormal", 0.0, 5000.0),
+        ("n5000-uncorr", 5000, 8, "uniform", 0.0, 500.0),
+    ],
+}
+
+# ======================
+# Solveurs
+# ======================
+def _as_optimized(cols: StockColumns) -> List[Dict]:
+    return [
+        {"name": n, "cost_eur": c / 100, "cost_cents": c, "percent": pct, "profit_eur": p / 100, "profit_cents": p}
+        for n, c, p, pct in zip(cols.names, cols.cost_cents, cols.profit_cents, cols.percent)
+    ]
+
+def _as_bruteforce(cols: StockColumns) -> List[Dict]:
+    return [
+        {"name": n, "cost": c / 100, "percent": pct, "profit": p / 100}
+        for n, c, p, pct in zip(cols.names, cols.cost_cents, cols.profit_cents, cols.percent)
+    ]
+
+def _run_optimized(engine):
+    def run(cols: StockColumns, budget_cents: int):
+        _, cost, profit, _ = engine(_as_optimized(cols), budget_cents)
+        return cost, profit, True
+    return run
+
+def _run_bruteforce(solver):
+    def run(cols: StockColumns, budget_cents: int):
+        _, cost, profit, _ = solver(_as_bruteforce(cols), budget_cents / 100)
+        return int(round(cost * 100)), int(round(profit * 100)), True
+    return run
+
+def _run_bnb(cols: StockColumns, budget_cents: int):
+    _, cost, profit, bound, _ = optimized.branch_and_bound(_as_optimized(cols), budget_cents, time_limit=60.0)
+    return cost, profit, bound == profit
+
+def _run_comparison(cols: StockColumns, budget_cents: int):
+    stocks = [(n, c / 100, p / 100) for n, c, p in zip(cols.names, cols.cost_cents, cols.profit_cents)]
+    _, cost, profit = comparison_results.knapsack(stocks, budget_cents / 100)
+    return int(round(cost * 100)), int(round(profit * 100)), True
+
+# nom -> (fonction(cols, budget_cents) -> (coût, profit, exact), limite de n, limite de n x budget)
+SOLVERS = {
+    "bruteforce": (_run_bruteforce(bruteforce.brute_force_optimize), 20, None),
+    "bruteforce_mitm": (_run_bruteforce(bruteforce.meet_in_the_middle_optimize), 40, None),
+    "optimized_python": (_run_optimized(optimized.knapsack_dp), None, 6e7),
+    "optimized_numpy": (_run_optimized(optimized.knapsack_dp_numpy), None, 2e9),
+    "optimized_hirschberg": (_run_optimized(lambda s, b: optimized.knapsack_dp_numpy(s, b, reconstruct="hirschberg")), None, 2e9),
+    "optimized_bnb": (_run_bnb, None, None),
+    "optimized_pareto": (_run_optimized(optimized.knapsack_pareto), None, 6e7),
+    "optimized_parallel": (_run_optimized(optimized.knapsack_parallel), None, 2e9),
+    "comparison_knapsack": (_run_comparison, None, 6e7),
+}
+
+def _applicable(solver: str, n: int, budget_cents: int) -> bool:
+    _, max_n, max_cells = SOLVERS[solver]
+    if max_n is not None and n > max_n:
+        return False
+    return max_cells is None or n * (budget_cents + 1) <= max_cells
+
+# ======================
+# Mesures
+# ======================
+def _measure_child(conn, solver: str, case: tuple, repeat: int) -> None:
+    _, n, seed, cost_dist, correlation, budget_eur = case
+    cols = generate_stocks(n, seed, cost_dist, correlation)
+    budget_cents = int(round(budget_eur * 100))
+    run = SOLVERS[solver][0]
+    try:
+        if optimized.resource is None:
+            tracemalloc.start()  # Windows : pic mémoire via tracemalloc, dans l'enfant qui mesure
+        start_rss = optimized.peak_memory_bytes() or 0
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            cost, profit, exact = run(cols, budget_cents)
+            times.append(time.perf_counter() - t0)
+        peak = optimized.peak_memory_bytes()
+        conn.send({"status": "ok", "time_s": min(times), "peak_mem_bytes": None if peak is None else max(0, peak - start_rss),
+                   "cost_cents": cost, "profit_cents": profit, "exact": exact})
+    except Exception as e:
+        conn.send({"status": "error", "error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+def measure(solver: str, case: tuple, repeat: int = 1, timeout: float = None) -> Dict:
+    """Lance un solveur sur un cas dans un processus enfant."""
+    parent, child = mp.Pipe(duplex=False)
+    proc = mp.Process(target=_measure_child, args=(child, solver, case, repeat))
+    proc.start()
+    child.close()
+    result = parent.recv() if parent.poll(timeout) else {"status": "timeout"}
+    if proc.is_alive():
+        proc.terminate()
+    proc.join()
+    return result
+
+def run_suite(cases: List[tuple], solvers: List[str], repeat: int = 1, timeout: float = None, log=None) -> List[Dict]:
+    records = []
+    for case in cases:
+        name, n, seed, cost_dist, correlation, budget_eur = case
+        budget_cents = int(round(budget_eur * 100))
+        case_records = []
+        for solver in solvers:
+            if not _applicable(solver, n, budget_cents):
+                continue
+            r = measure(solver, case, repeat, timeout)
+            r.update(case=name, solver=solver, n=n, seed=seed, cost_dist=cost_dist,
+                     correlation=correlation, budget_cents=budget_cents)
+            case_records.append(r)
+        # accord : tous les solveurs exacts doivent trouver le même profit
+        exact_profits = {r["profit_cents"] for r in case_records if r["status"] == "ok" and r["exact"]}
+        reference = max(exact_profits) if exact_profits else None
+        for r in case_records:
+            r["agree"] = r["status"] == "ok" and r["profit_cents"] == reference
+            if log is not None:
+                log(r)
+        records.extend(case_records)
+    return records
+
+def find_regressions(records: List[Dict], baseline: List[Dict], threshold: float, min_time: float = 0.005) -> List[str]:
+    """Mesures plus lentes que la base de plus de threshold (ou en désaccord).
+
+    Les écarts de moins de min_time secondes sont ignorés (bruit de mesure).
+    """
+    base = {(r["case"], r["solver"]): r for r in baseline if r.get("status") == "ok"}
+    problems = []
+    for r in records:
+        if r["status"] == "ok" and not r["agree"]:
+            problems.append(f"{r['case']} / {r['solver']} : résultat différent ({r['profit_cents']} centimes)")
+        old = base.get((r["case"], r["solver"]))
+        if old is None:
+            continue
+        if r["status"] != "ok":
+            problems.append(f"{r['case']} / {r['solver']} : {r['status']} (base : {old['time_s']:.4f} s)")
+        elif r["time_s"] > old["time_s"] * (1 + threshold) and r["time_s"] - old["time_s"] > min_time:
+            problems.append(f"{r['case']} / {r['solver']} : {r['time_s']:.4f} s contre {old['time_s']:.4f} s "
+                            f"(+{r['time_s'] / old['time_s'] - 1:.0%})")
+    return problems
+
+def _format_record(r: Dict) -> str:
+    if r["status"] != "ok":
+        return f"{r['case']:<18} {r['solver']:<22} {r['status']}"
+    mem = "-" if r["peak_mem_bytes"] is None else f"{r['peak_mem_bytes'] / (1024 * 1024):.1f} MiB"
+    flag = "ok" if r["agree"] else "DÉSACCORD"
+    return f"{r['case']:<18} {r['solver']:<22} {r['time_s']:>10.4f} s {mem:>12} {r['profit_cents'] / 100:>12.2f} € {flag}"
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Banc d'essai des solveurs sur des instances synthétiques")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    parser.add_argument("--solvers", default=",".join(SOLVERS), help="Solveurs à lancer, séparés par des virgules")
+    parser.add_argument("--repeat", type=int, default=1, help="Répétitions par mesure (on garde le meilleur temps)")
+    parser.add_argument("--timeout", type=float, default=None, help="Temps maximal par mesure (secondes)")
+    parser.add_argument("--output", "-o", help="Fichier JSON des résultats (à réutiliser comme base)")
+    parser.add_argument("--baseline", help="Fichier JSON de base pour détecter les régressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Ralentissement toléré par rapport à la base")
+    parser.add_argument("--min-time", type=float, default=0.005, help="Écart absolu (secondes) en dessous duquel un ralentissement est ignoré")
+    parser.add_argument("--write-csv", metavar="DOSSIER", help="Écrit aussi les instances générées en CSV")
+    args = parser.parse_args(argv)
+
+    solvers = [s.strip() for s in args.solvers.split(",") if s.strip()]
+    unknown = [s for s in solvers if s not in SOLVERS]
+    if unknown:
+        print(f"Solveur(s) inconnu(s): {', '.join(unknown)} (disponibles: {', '.join(SOLVERS)})")
+        return 2
+    cases = SUITES[args.suite]
+
+    if args.write_csv:
+        folder = Path(args.write_csv)
+        folder.mkdir(parents=True, exist_ok=True)
+        for name, n, seed, cost_dist, correlation, _ in cases:
+            write_csv(generate_stocks(n, seed, cost_dist, correlation), folder / f"{name}.csv")
+
+    records = run_suite(cases, solvers, args.repeat, args.timeout, log=lambda r: print(_format_record(r), flush=True))
+    for r in records:
+        if not r["agree"] and r["status"] == "ok":
+            print(f"⚠️  {r['case']} / {r['solver']} ne trouve pas le même profit que les autres solveurs exacts")
+
+    if args.output:
+        meta = {"python": platform.python_version(), "platform": platform.platform(),
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "suite": args.suite, "repeat": args.repeat}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": records}, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        problems = find_regressions(records, baseline, args.threshold, args.min_time)
+        if problems:
+            print(f"\n❌ {len(problems)} régression(s) (seuil {args.threshold:.0%}) :")
+            for p in problems:
+                print(f"   {p}")
+            return 1
+        print(f"\n✅ Aucune régression par rapport à {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -11,67 +11,35 @@ Lit un CSV d'actions et énumère *toutes* les combinaisons respectant :
 Puis renvoie la combinaison qui maximise le profit total après 2 ans.
 
 Usage:
-    python bruteforce.py
+    python bruteforce.py [fichier.csv] [--mode exhaustive|mitm] [--workers N]
+
+Le mode "mitm" (meet-in-the-middle, Horowitz–Sahni) donne le même optimum
+exact en O(2^(n/2) log 2^(n/2)) : utilisable jusqu'à 35–40 actions.
 """
 
-import csv
+import argparse
 import sys
+import time
+from multiprocessing import Pool
+from bisect import bisect_right
 from pathlib import Path
 from typing import List, Dict, Tuple
 
-BUDGET_EUR = 500.0
+from preprocess import reduce_instance, format_stats
+from stock_loader import load_columns
 
-def parse_float(value: str) -> float:
-    """Convertit une chaîne en float en gérant €, %, espaces, et virgule décimale."""
-    if value is None:
-        raise ValueError("Valeur manquante")
-    s = str(value).strip()
-    s = s.replace("€", "").replace("%", "").replace(" ", "").replace("\u00A0", "")
-    s = s.replace(",", ".")
-    if s == "":
-        raise ValueError("Valeur vide")
-    return float(s)
+BUDGET_EUR = 500.0
 
 def load_stocks(csv_path: Path) -> List[Dict]:
-    """Charge et nettoie les données d'actions depuis un CSV."""
-    stocks: List[Dict] = []
-    with csv_path.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-
-        def key_like(targets: List[str]) -> str:
-            for k in reader.fieldnames or []:
-                kl = k.lower().strip()
-                for t in targets:
-                    if t in kl:
-                        return k
-            raise KeyError(f"Colonne manquante: {targets} parmi {reader.fieldnames}")
-
-        try:
-            name_key = key_like(["action", "titre", "name"])
-            cost_key = key_like(["coût", "cout", "price", "prix"])
-            benefit_key = key_like(["bénéfice", "benefice", "profit", "return"])
-        except KeyError as e:
-            raise SystemExit(f"Erreur d'en-têtes CSV: {e}")
-
-        for row in reader:
-            try:
-                name = str(row[name_key]).strip()
-                cost = parse_float(row[cost_key])
-                percent = parse_float(row[benefit_key])
-                if cost <= 0:
-                    continue
-                profit = cost * (percent / 100.0)
-                if profit <= 0:
-                    continue
-                stocks.append({
-                    "name": name,
-                    "cost": round(cost, 2),
-                    "percent": percent,
-                    "profit": round(profit, 2),
-                })
-            except Exception:
-                continue
-    return stocks
+    """Charge et nettoie les données d'actions depuis un CSV (voir stock_loader.py)."""
+    try:
+        cols = load_columns(csv_path)
+    except KeyError as e:
+        raise SystemExit(f"Erreur d'en-têtes CSV: {e}")
+    return [
+        {"name": name, "cost": cost / 100, "percent": percent, "profit": profit / 100}
+        for name, cost, profit, percent in zip(cols.names, cols.cost_cents, cols.profit_cents, cols.percent)
+    ]
 
 def brute_force_optimize(stocks: List[Dict], budget: float=BUDGET_EUR) -> Tuple[List[Dict], float, float, int]:
     """Teste toutes les combinaisons et retourne (sélection, coût_total, profit_total, nb_combos_testées)."""
@@ -102,12 +70,193 @@ def brute_force_optimize(stocks: List[Dict], budget: float=BUDGET_EUR) -> Tuple[
     best_selection = [stocks[i] for i in best_subset_indices]
     return best_selection, round(best_cost, 2), round(best_profit, 2), combos_tested
 
+def _half_subsets(costs: List[int], profits: List[int]) -> Tuple[List[int], List[int], List[int]]:
+    """Énumère les 2^m sous-ensembles d'une moitié en ordre de Gray.
+
+    Chaque sous-ensemble diffère du précédent d'une seule action : coût et profit
+    sont mis à jour par un ajout ou un retrait au lieu d'être resommés.
+    """
+    m = len(costs)
+    sub_costs, sub_profits, sub_masks = [0], [0], [0]
+    mask = cost = profit = 0
+    for k in range(1, 1 << m):
+        bit = (k & -k).bit_length() - 1
+        mask ^= 1 << bit
+        if mask >> bit & 1:
+            cost += costs[bit]
+            profit += profits[bit]
+        else:
+            cost -= costs[bit]
+            profit -= profits[bit]
+        sub_costs.append(cost)
+        sub_profits.append(profit)
+        sub_masks.append(mask)
+    return sub_costs, sub_profits, sub_masks
+
+def meet_in_the_middle_optimize(stocks: List[Dict], budget: float=BUDGET_EUR) -> Tuple[List[Dict], float, float, int]:
+    """Force brute exacte par meet-in-the-middle (Horowitz–Sahni).
+
+    Les actions sont coupées en deux moitiés dont on énumère les sous-ensembles.
+    La seconde moitié est triée par coût et réduite à sa frontière de Pareto
+    (profit strictement croissant) ; pour chaque sous-ensemble de la première,
+    une recherche dichotomique donne le meilleur complément dans le budget.
+    Les calculs se font en centimes. Le nombre de combinaisons couvertes
+    (2^n - 1) est renvoyé comme pour brute_force_optimize.
+    """
+    n = len(stocks)
+    costs = [int(round(s["cost"] * 100)) for s in stocks]
+    profits = [int(round(s["profit"] * 100)) for s in stocks]
+    budget_cents = int(round(budget * 100))
+    half = n // 2
+
+    # Seconde moitié : tri par coût puis frontière de Pareto
+    b_costs, b_profits, b_masks = _half_subsets(costs[half:], profits[half:])
+    front_costs: List[int] = []
+    front_profits: List[int] = []
+    front_masks: List[int] = []
+    for j in sorted(range(len(b_costs)), key=b_costs.__getitem__):
+        if b_costs[j] > budget_cents:
+            break
+        if not front_profits or b_profits[j] > front_profits[-1]:
+            front_costs.append(b_costs[j])
+            front_profits.append(b_profits[j])
+            front_masks.append(b_masks[j])
+    del b_costs, b_profits, b_masks
+
+    # Première moitié : appariement par recherche dichotomique
+    best = (0, 0, 0, 0)  # (profit, -coût, masque A, masque B)
+    a_costs, a_profits, a_masks = _half_subsets(costs[:half], profits[:half])
+    for cost_a, profit_a, mask_a in zip(a_costs, a_profits, a_masks):
+        if cost_a > budget_cents:
+            continue
+        j = bisect_right(front_costs, budget_cents - cost_a) - 1
+        candidate = (profit_a + front_profits[j], -(cost_a + front_costs[j]), mask_a, front_masks[j])
+        if candidate > best:
+            best = candidate
+
+    _, _, mask_a, mask_b = best
+    indices = [i for i in range(half) if mask_a >> i & 1]
+    indices += [half + i for i in range(n - half) if mask_b >> i & 1]
+    best_selection = [stocks[i] for i in indices]
+    best_cost = sum(s["cost"] for s in best_selection)
+    best_profit = sum(s["profit"] for s in best_selection)
+    return best_selection, round(best_cost, 2), round(best_profit, 2), (1 << n) - 1
+
+# État partagé par les processus de parallel_brute_force_optimize (voir _init_worker)
+_WORKER_COSTS: List[int] = []
+_WORKER_PROFITS: List[int] = []
+_WORKER_BUDGET = 0
+
+def _init_worker(costs: List[int], profits: List[int], budget_cents: int) -> None:
+    global _WORKER_COSTS, _WORKER_PROFITS, _WORKER_BUDGET
+    _WORKER_COSTS, _WORKER_PROFITS, _WORKER_BUDGET = costs, profits, budget_cents
+
+def _enumerate_block(block: Tuple[int, int]) -> Tuple[int, int, int]:
+    """Énumère les masques [prefix << low_bits, (prefix + 1) << low_bits).
+
+    Les bits hauts sont fixés par le préfixe ; les bits bas sont parcourus en
+    profondeur en mettant à jour coût et profit à chaque ajout. Dès que le coût
+    dépasse le budget, toutes les combinaisons contenant ce préfixe sont comptées
+    comme testées sans être visitées. Renvoie (profit, masque, nb_combinaisons).
+    """
+    prefix, low_bits = block
+    costs, profits, budget = _WORKER_COSTS, _WORKER_PROFITS, _WORKER_BUDGET
+    prefix_mask = prefix << low_bits
+    cost = profit = 0
+    for i in range(low_bits, len(costs)):
+        if prefix_mask >> i & 1:
+            cost += costs[i]
+            profit += profits[i]
+    if cost > budget:
+        return -1, 0, 1 << low_bits
+
+    best = [profit, prefix_mask]
+
+    def walk(i: int, cost: int, profit: int, mask: int) -> None:
+        if i < 0:
+            if profit > best[0] or (profit == best[0] and mask < best[1]):
+                best[0], best[1] = profit, mask
+            return
+        walk(i - 1, cost, profit, mask)
+        cost += costs[i]
+        if cost <= budget:
+            walk(i - 1, cost, profit + profits[i], mask | 1 << i)
+
+    walk(low_bits - 1, cost, profit, prefix_mask)
+    return best[0], best[1], 1 << low_bits
+
+def parallel_brute_force_optimize(stocks: List[Dict], budget: float=BUDGET_EUR, workers: int=1, progress=None) -> Tuple[List[Dict], float, float, int]:
+    """Force brute exhaustive répartie sur un pool de processus.
+
+    L'espace des masques est découpé en blocs contigus (bits hauts fixés) distribués
+    aux processus ; chacun garde son meilleur local et les meilleurs sont réduits
+    en une seule réponse (plus grand profit, puis plus petit masque comme
+    brute_force_optimize). progress(blocs_faits, blocs_total, combos, secondes)
+    est appelé à chaque bloc terminé. Les sommes se font en centimes.
+    """
+    n = len(stocks)
+    costs = [int(round(s["cost"] * 100)) for s in stocks]
+    profits = [int(round(s["profit"] * 100)) for s in stocks]
+    budget_cents = int(round(budget * 100))
+
+    # ~8 blocs par processus pour lisser la charge (les blocs élagués sont courts)
+    high_bits = min(n, max(0, (workers * 8 - 1).bit_length()))
+    low_bits = n - high_bits
+    blocks = [(prefix, low_bits) for prefix in range(1 << high_bits)]
+
+    best_profit, best_mask, combos = 0, 0, 0
+    start = time.perf_counter()
+    with Pool(workers, initializer=_init_worker, initargs=(costs, profits, budget_cents)) as pool:
+        for done, (profit, mask, count) in enumerate(pool.imap_unordered(_enumerate_block, blocks), 1):
+            combos += count
+            if profit > best_profit or (profit == best_profit and profit > 0 and mask < best_mask):
+                best_profit, best_mask = profit, mask
+            if progress is not None:
+                progress(done, len(blocks), combos, time.perf_counter() - start)
+
+    best_selection = [stocks[i] for i in range(n) if best_mask >> i & 1]
+    best_cost = sum(s["cost"] for s in best_selection)
+    best_profit = sum(s["profit"] for s in best_selection)
+    # le masque vide n'est pas compté, comme dans brute_force_optimize
+    return best_selection, round(best_cost, 2), round(best_profit, 2), combos - 1
+
+def reduce_stocks(stocks: List[Dict], budget: float=BUDGET_EUR):
+    """Applique preprocess.reduce_instance avant l'énumération.
+
+    Renvoie (actions_réduites, budget_réduit, expand, stats) ; expand(sélection)
+    ramène une sélection d'actions réduites aux actions d'origine en y ajoutant
+    les actions forcées par la réduction.
+    """
+    reduction = reduce_instance(
+        [s["name"] for s in stocks],
+        [int(round(s["cost"] * 100)) for s in stocks],
+        [int(round(s["profit"] * 100)) for s in stocks],
+        int(round(budget * 100)),
+    )
+    scale = reduction["scale"]
+    work = [dict(stocks[i], cost=int(round(stocks[i]["cost"] * 100)) // scale / 100) for i in reduction["kept"]]
+    originals = {id(w): i for w, i in zip(work, reduction["kept"])}
+    fixed_in = reduction["fixed_in"]
+
+    def expand(selection: List[Dict]) -> List[Dict]:
+        return [stocks[i] for i in sorted([originals[id(s)] for s in selection] + fixed_in)]
+
+    return work, reduction["budget"] / 100, expand, reduction["stats"]
+
+SOLVERS = {
+    "exhaustive": brute_force_optimize,
+    "mitm": meet_in_the_middle_optimize,
+}
+
 def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Optimiseur force brute (toutes les combinaisons)")
     # Utilisation du chemin passé en argument ou chemin par défaut
-    if len(argv) > 1:
-        csv_path = Path(argv[1])
-    else:
-        csv_path = Path(r"C:\Users\sylva\Documents\School 2\Liste+d'actions+-+P7+Python+-+Feuille+1.csv")
+    parser.add_argument("csv", nargs="?", default=r"C:\Users\sylva\Documents\School 2\Liste+d'actions+-+P7+Python+-+Feuille+1.csv", help="Fichier CSV des actions")
+    parser.add_argument("--mode", choices=sorted(SOLVERS), default="exhaustive", help="exhaustive = 2^n masques, mitm = meet-in-the-middle (35-40 actions)")
+    parser.add_argument("--workers", "-w", type=int, default=1, help="Nombre de processus pour le mode exhaustive")
+    parser.add_argument("--reduce", action="store_true", help="Réduit l'instance (dominance, bornes LP, PGCD...) avant l'énumération")
+    args = parser.parse_args(argv[1:])
+    csv_path = Path(args.csv)
 
     if not csv_path.exists():
         print(f"Fichier introuvable: {csv_path}")
@@ -118,11 +267,32 @@ def main(argv: List[str]) -> int:
         print("Aucune action valide trouvée après nettoyage.")
         return 1
 
-    selection, total_cost, total_profit, combos = brute_force_optimize(stocks, BUDGET_EUR)
+    work, work_budget = stocks, BUDGET_EUR
+    if args.reduce:
+        work, work_budget, expand, reduction_stats = reduce_stocks(stocks, BUDGET_EUR)
+        print(format_stats(reduction_stats))
+
+    start = time.perf_counter()
+    if args.mode == "exhaustive" and args.workers > 1:
+        def show_progress(done: int, total: int, combos: int, elapsed: float) -> None:
+            rate = combos / elapsed if elapsed > 0 else 0.0
+            print(f"\rBlocs {done}/{total} | {combos:,} combinaisons | {rate:,.0f} combinaisons/s".replace(",", " "),
+                  end="", file=sys.stderr, flush=True)
+        selection, total_cost, total_profit, combos = parallel_brute_force_optimize(
+            work, work_budget, workers=args.workers, progress=show_progress)
+        print(file=sys.stderr)
+    else:
+        selection, total_cost, total_profit, combos = SOLVERS[args.mode](work, work_budget)
+    elapsed = time.perf_counter() - start
+    if args.reduce:
+        selection = expand(selection)
+        total_cost = round(sum(s["cost"] for s in selection), 2)
+        total_profit = round(sum(s["profit"] for s in selection), 2)
 
     print("=== Résultat optimal (force brute) ===")
     print(f"Budget maximal      : {BUDGET_EUR:.2f} €")
     print(f"Combinaisons testées: {combos:,}".replace(",", " "))
+    print(f"Débit               : {combos / elapsed if elapsed > 0 else 0:,.0f} combinaisons/s ({elapsed:.2f} s)".replace(",", " "))
     print(f"Nombre d'actions    : {len(selection)} / {len(stocks)}")
     print(f"Coût total          : {total_cost:.2f} €")
     print(f"Profit total (2 ans): {total_profit:.2f} €")
@@ -1,54 +1,16 @@
-import csv
 from pathlib import Path
 
-BUDGET = 500.0
+from stock_loader import load_columns
 
-def parse_float(value: str) -> float:
-    """Convertit un texte en float (gère €, %, virgules)."""
-    s = str(value).strip()
-    s = s.replace("€", "").replace("%", "").replace(" ", "").replace(",", ".")
-    return float(s)
+BUDGET = 500.0
 
 def load_stocks(file_path: Path):
-    """Charge les actions en acceptant plusieurs formats d'en-têtes."""
-    stocks = []
-    with file_path.open(newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-
-        # Reconnaissance souple des noms de colonnes
-        def find_key(possible_names):
-            for key in reader.fieldnames:
-                if key is None:
-                    continue
-                k = key.lower().strip()
-                for name in possible_names:
-                    if name in k:
-                        return key
-            raise KeyError(f"Impossible de trouver une colonne parmi {possible_names}")
-
-        name_key = find_key(["action", "titre", "name"])
-        price_key = find_key(["coût", "cout", "prix", "price"])
-        profit_key = find_key(["bénéfice", "benefice", "profit", "return"])
-
-        for row in reader:
-            try:
-                name = row[name_key].strip()
-                cost = parse_float(row[price_key])
-                percent = parse_float(row[profit_key])
-                if cost <= 0:
-                    continue
-                profit = cost * (percent / 100)
-                if profit <= 0:
-                    continue
-                stocks.append({
-                    "name": name,
-                    "cost": round(cost, 2),
-                    "percent": percent,
-                    "profit": round(profit, 2)
-                })
-            except Exception:
-                continue
-    return stocks
+    """Charge les actions en acceptant plusieurs formats d'en-têtes (voir stock_loader.py)."""
+    cols = load_columns(file_path)
+    return [
+        {"name": name, "cost": cost / 100, "percent": percent, "profit": profit / 100}
+        for name, cost, profit, percent in zip(cols.names, cols.cost_cents, cols.profit_cents, cols.percent)
+    ]
 
 def best_single_stock(stocks, budget=BUDGET):
     """Retourne l'action unique la plus rentable (dans le budget)."""
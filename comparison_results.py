@@ -1,74 +1,140 @@
 import os
+import sys
 import csv
+import json
+import time
+import argparse
+from multiprocessing import Pool
+
+from preprocess import reduce_instance, format_stats
+from dataset_cache import load_columns_cached, format_cache_stats, CACHE_STATS
+
+# Portefeuilles de référence de Sienna (coût et profit en €), par fichier de dataset
+SIENNA_REFERENCES = {
+    "dataset1_Python+P7.csv": {
+        "cost": 498.76,
+        "profit": 196.61,
+        "actions": ["Share-GRUT"],
+    },
+    "dataset2_Python+P7.csv": {
+        "cost": 489.24,
+        "profit": 193.78,
+        "actions": ["Share-ECAQ", "Share-IXCI", "Share-FWBE", "Share-ZOFA", "Share-PLLK",
+                    "Share-YFVZ", "Share-ANFX", "Share-PATS", "Share-NDKR", "Share-ALIY",
+                    "Share-JWGF", "Share-JGTW", "Share-FAPS", "Share-VCAX", "Share-LFXB",
+                    "Share-DWSK", "Share-XQII", "Share-ROOM"],
+    },
+}
 
 # ======================
 # Algo optimisé (sac à dos dynamique)
 # ======================
-def load_stocks(file_path):
-    """Charge les actions depuis un fichier CSV"""
-    stocks = []
+def read_stocks(file_path, use_cache=True):
+    """Comme load_stocks, mais les erreurs de lecture sont levées au lieu d'être affichées"""
+    cols = load_columns_cached(file_path, use_cache=use_cache)
+    return [(name, cost / 100, profit / 100) for name, cost, profit in zip(cols.names, cols.cost_cents, cols.profit_cents)]
+
+def load_stocks(file_path, use_cache=True):
+    """Charge les actions depuis un fichier CSV (name, prix, profit en €)
+
+    La lecture passe par stock_loader (et le cache disque sauf use_cache=False) :
+    la colonne profit du CSV est un pourcentage du prix, converti ici en euros.
+    """
     try:
-        with open(file_path, newline='', encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                try:
-                    name = row['name']
-                    price = float(row['price'])
-                    profit = float(row['profit'])
-                    if price > 0 and profit > 0:
-                        stocks.append((name, price, profit))
-                except (KeyError, ValueError):
-                    continue
+        return read_stocks(file_path, use_cache)
     except FileNotFoundError:
         print(f"❌ Fichier {file_path} introuvable !")
         return []
     except Exception as e:
         print(f"❌ Erreur lors du chargement de {file_path}: {e}")
         return []
-    return stocks
 
-def knapsack(stocks, max_budget=500):
-    """Algorithme du sac à dos pour optimiser les investissements"""
-    if not stocks:
-        return [], 0, 0
-        
-    n = len(stocks)
-    W = int(max_budget * 100)  # Éviter les flottants → centimes
-    dp = [[0] * (W + 1) for _ in range(n + 1)]
-
-    # Remplissage de la matrice DP
-    for i in range(1, n + 1):
-        name, cost, profit = stocks[i - 1]
-        cost = int(cost * 100)
-        for w in range(W + 1):
-            if cost <= w:
-                dp[i][w] = max(dp[i - 1][w], dp[i - 1][w - cost] + profit)
-            else:
-                dp[i][w] = dp[i - 1][w]
+def _knapsack_select(costs, profits, W, reconstruct="bitset"):
+    """Indices choisis par la DP (coûts entiers en centimes, budget W)
+
+    Une seule ligne DP (W + 1 valeurs) est conservée ; en mode "bitset", les
+    décisions de chaque action sont stockées sur 1 bit par centime pour la
+    reconstruction, au lieu de la matrice complète (n + 1) x (W + 1) : cela
+    reste n x W / 8 octets (~625 Mo pour 1000 actions à 50 000 €). Le mode
+    "hirschberg" (optimized.knapsack_hirschberg) ne garde que des lignes de
+    W + 1 valeurs, au prix d'environ log2(n) remplissages de la DP.
+    """
+    if reconstruct == "hirschberg":
+        from optimized import knapsack_hirschberg
+        items = [{"i": i, "cost_cents": cost, "profit_cents": profit} for i, (cost, profit) in enumerate(zip(costs, profits))]
+        return [s["i"] for s in knapsack_hirschberg(items, W)[0]]
+    if reconstruct != "bitset":
+        raise ValueError(f"mode de reconstruction inconnu : {reconstruct}")
+    n = len(costs)
+    dp = [0] * (W + 1)
+    decisions = []
+
+    # Remplissage de la ligne DP (parcours décroissant : chaque action au plus une fois)
+    for i in range(n):
+        cost, profit = costs[i], profits[i]
+        taken = bytearray((W >> 3) + 1)
+        for w in range(W, cost - 1, -1):
+            candidate = dp[w - cost] + profit
+            if candidate > dp[w]:
+                dp[w] = candidate
+                taken[w >> 3] |= 1 << (w & 7)
+        decisions.append(taken)
 
     # Reconstruction des choix optimaux
     w = W
     chosen = []
-    for i in range(n, 0, -1):
-        if dp[i][w] != dp[i - 1][w]:
-            name, cost, profit = stocks[i - 1]
-            chosen.append((name, cost, profit))
-            w -= int(cost * 100)
+    for i in range(n - 1, -1, -1):
+        if decisions[i][w >> 3] >> (w & 7) & 1:
+            chosen.append(i)
+            w -= costs[i]
+    return chosen[::-1]
+
+def knapsack(stocks, max_budget=500, reconstruct="bitset"):
+    """Algorithme du sac à dos pour optimiser les investissements (reconstruct : voir _knapsack_select)"""
+    if not stocks:
+        return [], 0, 0
+
+    W = int(max_budget * 100)  # Éviter les flottants → centimes
+    costs = [int(round(cost * 100)) for _, cost, _ in stocks]
+    profits = [profit for _, _, profit in stocks]
+    chosen = [stocks[i] for i in _knapsack_select(costs, profits, W, reconstruct)]
+
+    total_cost = sum(x[1] for x in chosen)
+    total_profit = sum(x[2] for x in chosen)
+    return chosen, total_cost, total_profit
+
+def knapsack_reduced(stocks, max_budget=500, reconstruct="bitset"):
+    """Comme knapsack, après réduction de l'instance (voir preprocess.py)
+
+    Retourne (choix, coût_total, profit_total, stats_de_réduction).
+    """
+    W = int(max_budget * 100)
+    costs = [int(round(cost * 100)) for _, cost, _ in stocks]
+    reduction = reduce_instance(
+        [name for name, _, _ in stocks], costs, [int(round(profit * 100)) for _, _, profit in stocks], W)
+    kept, scale = reduction["kept"], reduction["scale"]
+    picked = _knapsack_select([costs[i] // scale for i in kept], [stocks[i][2] for i in kept], reduction["budget"],
+                              reconstruct)
+    chosen = [stocks[i] for i in sorted([kept[k] for k in picked] + reduction["fixed_in"])]
 
     total_cost = sum(x[1] for x in chosen)
     total_profit = sum(x[2] for x in chosen)
-    return chosen[::-1], total_cost, total_profit
+    return chosen, total_cost, total_profit, reduction["stats"]
 
 # ======================
 # Création de données de test
 # ======================
 def create_test_data():
-    """Crée des fichiers CSV de test si ils n'existent pas"""
+    """Crée des fichiers CSV de test si ils n'existent pas
+
+    La colonne profit est un pourcentage du prix, comme dans les vrais datasets
+    (stock_loader la lit ainsi) : Share-GRUT à 498.76 € et 39.42 % rapporte 196.61 €.
+    """
     # Dataset 1 : Une seule action très chère
     dataset1_data = [
-        {"name": "Share-GRUT", "price": "498.76", "profit": "196.61"},
+        {"name": "Share-GRUT", "price": "498.76", "profit": "39.42"},
         {"name": "Share-TEST", "price": "100.00", "profit": "50.00"},
-        {"name": "Share-DEMO", "price": "200.00", "profit": "80.00"},
+        {"name": "Share-DEMO", "price": "200.00", "profit": "40.00"},
     ]
     
     with open("dataset1_Python+P7.csv", "w", newline="", encoding="utf-8") as f:
@@ -78,24 +144,24 @@ def create_test_data():
     
     # Dataset 2 : Plusieurs actions plus petites
     dataset2_data = [
-        {"name": "Share-ECAQ", "price": "25.50", "profit": "10.20"},
-        {"name": "Share-IXCI", "price": "30.75", "profit": "12.30"},
-        {"name": "Share-FWBE", "price": "45.20", "profit": "18.08"},
-        {"name": "Share-ZOFA", "price": "22.10", "profit": "8.84"},
-        {"name": "Share-PLLK", "price": "38.90", "profit": "15.56"},
-        {"name": "Share-YFVZ", "price": "41.25", "profit": "16.50"},
-        {"name": "Share-ANFX", "price": "28.60", "profit": "11.44"},
-        {"name": "Share-PATS", "price": "33.80", "profit": "13.52"},
-        {"name": "Share-NDKR", "price": "27.45", "profit": "10.98"},
-        {"name": "Share-ALIY", "price": "35.15", "profit": "14.06"},
-        {"name": "Share-JWGF", "price": "24.30", "profit": "9.72"},
-        {"name": "Share-JGTW", "price": "31.95", "profit": "12.78"},
-        {"name": "Share-FAPS", "price": "26.85", "profit": "10.74"},
-        {"name": "Share-VCAX", "price": "29.70", "profit": "11.88"},
-        {"name": "Share-LFXB", "price": "32.40", "profit": "12.96"},
-        {"name": "Share-DWSK", "price": "23.55", "profit": "9.42"},
-        {"name": "Share-XQII", "price": "36.20", "profit": "14.48"},
-        {"name": "Share-ROOM", "price": "40.15", "profit": "16.06"},
+        {"name": "Share-ECAQ", "price": "25.50", "profit": "40.00"},
+        {"name": "Share-IXCI", "price": "30.75", "profit": "40.00"},
+        {"name": "Share-FWBE", "price": "45.20", "profit": "40.00"},
+        {"name": "Share-ZOFA", "price": "22.10", "profit": "40.00"},
+        {"name": "Share-PLLK", "price": "38.90", "profit": "40.00"},
+        {"name": "Share-YFVZ", "price": "41.25", "profit": "40.00"},
+        {"name": "Share-ANFX", "price": "28.60", "profit": "40.00"},
+        {"name": "Share-PATS", "price": "33.80", "profit": "40.00"},
+        {"name": "Share-NDKR", "price": "27.45", "profit": "40.00"},
+        {"name": "Share-ALIY", "price": "35.15", "profit": "40.00"},
+        {"name": "Share-JWGF", "price": "24.30", "profit": "40.00"},
+        {"name": "Share-JGTW", "price": "31.95", "profit": "40.00"},
+        {"name": "Share-FAPS", "price": "26.85", "profit": "40.00"},
+        {"name": "Share-VCAX", "price": "29.70", "profit": "40.00"},
+        {"name": "Share-LFXB", "price": "32.40", "profit": "40.00"},
+        {"name": "Share-DWSK", "price": "23.55", "profit": "40.00"},
+        {"name": "Share-XQII", "price": "36.20", "profit": "40.00"},
+        {"name": "Share-ROOM", "price": "40.15", "profit": "40.00"},
     ]
     
     with open("dataset2_Python+P7.csv", "w", newline="", encoding="utf-8") as f:
@@ -108,52 +174,58 @@ def create_test_data():
 # ======================
 # Comparaison Algo vs Sienna
 # ======================
-def compare_results(dataset_name, file_path, sienna_cost, sienna_profit, sienna_actions):
-    """Compare les résultats de l'algorithme optimisé avec ceux de Sienna"""
-    stocks = load_stocks(file_path)
-    
-    if not stocks:
-        print(f"❌ Impossible de charger les données pour {dataset_name}")
-        return None
-    
-    chosen, cost, profit = knapsack(stocks)
+def solve_stocks(stocks, max_budget=500, reduce=False, reconstruct="bitset"):
+    """(choix, coût_total, profit_total, stats_de_réduction ou None) pour des actions déjà chargées"""
+    if reduce:
+        return knapsack_reduced(stocks, max_budget, reconstruct)
+    return (*knapsack(stocks, max_budget, reconstruct), None)
 
-    print(f"\n{'='*50}")
-    print(f"📊 COMPARAISON - {dataset_name}")
-    print(f"{'='*50}")
-    
-    print(f"🤖 Algo Optimisé :")
-    print(f"   💰 Coût total   : {cost:.2f} €")
-    print(f"   📈 Profit total : {profit:.2f} €")
-    print(f"   🎯 ROI          : {(profit/cost*100):.1f}%")
-    print(f"   📋 Actions      : {len(chosen)} action(s)")
-    
-    print(f"\n👤 Sienna :")
-    print(f"   💰 Coût total   : {sienna_cost:.2f} €")
-    print(f"   📈 Profit total : {sienna_profit:.2f} €")
-    print(f"   🎯 ROI          : {(sienna_profit/sienna_cost*100):.1f}%")
-    print(f"   📋 Actions      : {len(sienna_actions)} action(s)")
-    
+def compare_stocks(dataset_name, solution, sienna_cost, sienna_profit, sienna_actions, reduction_stats=None, verbose=True):
+    """Étape de comparaison d'une solution déjà calculée (utilisée aussi par le mode batch)
+
+    solution est le triplet (choix, coût_total, profit_total) de knapsack.
+    verbose=False n'affiche rien et renvoie seulement le dict de résultats.
+    """
+    chosen, cost, profit = solution
     # Calcul des différences
     diff_cost = cost - sienna_cost
     diff_profit = profit - sienna_profit
+
+    if verbose:
+        print(f"\n{'='*50}")
+        print(f"📊 COMPARAISON - {dataset_name}")
+        print(f"{'='*50}")
     
-    print(f"\n🔍 DIFFÉRENCES :")
-    print(f"   💰 Coût    : {diff_cost:+.2f} € ({'+' if diff_cost > 0 else ''}{'plus cher' if diff_cost > 0 else 'moins cher' if diff_cost < 0 else 'identique'})")
-    print(f"   📈 Profit  : {diff_profit:+.2f} € ({'+' if diff_profit > 0 else ''}{'meilleur' if diff_profit > 0 else 'moins bon' if diff_profit < 0 else 'identique'})")
+        if reduction_stats is not None:
+            print(f"⚙️  {format_stats(reduction_stats)}")
+        print(f"🤖 Algo Optimisé :")
+        print(f"   💰 Coût total   : {cost:.2f} €")
+        print(f"   📈 Profit total : {profit:.2f} €")
+        print(f"   🎯 ROI          : {(profit/cost*100):.1f}%")
+        print(f"   📋 Actions      : {len(chosen)} action(s)")
     
-    if diff_profit > 0:
-        print(f"   🏆 L'algorithme optimisé est MEILLEUR de {diff_profit:.2f} € !")
-    elif diff_profit < 0:
-        print(f"   🤔 Sienna est meilleure de {abs(diff_profit):.2f} € (inattendu)")
-    else:
-        print(f"   ⚖️  Résultats identiques")
+        print(f"\n👤 Sienna :")
+        print(f"   💰 Coût total   : {sienna_cost:.2f} €")
+        print(f"   📈 Profit total : {sienna_profit:.2f} €")
+        print(f"   🎯 ROI          : {(sienna_profit/sienna_cost*100):.1f}%")
+        print(f"   📋 Actions      : {len(sienna_actions)} action(s)")
+    
+        print(f"\n🔍 DIFFÉRENCES :")
+        print(f"   💰 Coût    : {diff_cost:+.2f} € ({'+' if diff_cost > 0 else ''}{'plus cher' if diff_cost > 0 else 'moins cher' if diff_cost < 0 else 'identique'})")
+        print(f"   📈 Profit  : {diff_profit:+.2f} € ({'+' if diff_profit > 0 else ''}{'meilleur' if diff_profit > 0 else 'moins bon' if diff_profit < 0 else 'identique'})")
+    
+        if diff_profit > 0:
+            print(f"   🏆 L'algorithme optimisé est MEILLEUR de {diff_profit:.2f} € !")
+        elif diff_profit < 0:
+            print(f"   🤔 Sienna est meilleure de {abs(diff_profit):.2f} € (inattendu)")
+        else:
+            print(f"   ⚖️  Résultats identiques")
 
-    print(f"\n📋 DÉTAIL DES ACTIONS :")
-    print(f"🤖 Algo : {[x[0] for x in chosen]}")
-    print(f"👤 Sienna : {sienna_actions}")
+        print(f"\n📋 DÉTAIL DES ACTIONS :")
+        print(f"🤖 Algo : {[x[0] for x in chosen]}")
+        print(f"👤 Sienna : {sienna_actions}")
     
-    print(f"\n{'='*50}")
+        print(f"\n{'='*50}")
 
     return {
         "dataset": dataset_name,
@@ -163,12 +235,177 @@ def compare_results(dataset_name, file_path, sienna_cost, sienna_profit, sienna_
         "sienna_cost": sienna_cost,
         "sienna_profit": sienna_profit,
         "sienna_actions": sienna_actions,
+        "diff_cost": diff_cost,
+        "diff_profit": diff_profit,
     }
 
+def compare_results(dataset_name, file_path, sienna_cost, sienna_profit, sienna_actions, reduce=False, use_cache=True,
+                    reconstruct="bitset"):
+    """Compare les résultats de l'algorithme optimisé avec ceux de Sienna
+
+    reduce=True réduit l'instance (preprocess.py) avant la DP ; reconstruct
+    choisit la reconstruction (voir _knapsack_select).
+    """
+    stocks = load_stocks(file_path, use_cache)
+    
+    if not stocks:
+        print(f"❌ Impossible de charger les données pour {dataset_name}")
+        return None
+
+    chosen, cost, profit, reduction_stats = solve_stocks(stocks, reduce=reduce, reconstruct=reconstruct)
+    return compare_stocks(dataset_name, (chosen, cost, profit), sienna_cost, sienna_profit, sienna_actions, reduction_stats)
+
+# ======================
+# Mode batch (manifeste de jobs)
+# ======================
+def load_manifest(manifest_path):
+    """Charge un manifeste de jobs (liste JSON, ou un objet JSON par ligne si .jsonl)
+
+    Chaque job : {"name": ..., "csv": ..., "budget": 500, "reference": {...}}.
+    "reference" est soit un dict {"cost", "profit", "actions"} (portefeuille de
+    Sienna), soit le chemin d'un fichier JSON contenant ce dict. Les chemins
+    relatifs sont résolus depuis le dossier du manifeste.
+    """
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, encoding="utf-8") as f:
+        if manifest_path.endswith(".jsonl"):
+            raw_jobs = [json.loads(line) for line in f if line.strip()]
+        else:
+            raw_jobs = json.load(f)
+
+    jobs = []
+    for i, job in enumerate(raw_jobs):
+        reference = job.get("reference") or {}
+        if isinstance(reference, str):
+            with open(os.path.join(base, reference), encoding="utf-8") as rf:
+                reference = json.load(rf)
+        csv_path = os.path.join(base, job["csv"])
+        jobs.append({
+            "job": job.get("name", f"job-{i}"),
+            "csv": csv_path,
+            "budget": float(job.get("budget", 500)),
+            "sienna_cost": float(reference.get("cost", 0.0)),
+            "sienna_profit": float(reference.get("profit", 0.0)),
+            "sienna_actions": list(reference.get("actions", [])),
+        })
+    return jobs
+
+def _run_csv_jobs(task):
+    """Exécute tous les jobs d'un même CSV : une seule lecture, une DP par budget distinct
+
+    La solution ne dépend pas du portefeuille de référence : chaque budget est
+    résolu une fois, puis compare_stocks compare chaque job à sa référence.
+    """
+    csv_path, jobs, reduce, use_cache, reconstruct = task
+    hits = CACHE_STATS["hits"]
+    start = time.perf_counter()
+    try:
+        stocks = read_stocks(csv_path, use_cache)
+        if not stocks:
+            raise ValueError(f"aucune action valide dans {csv_path}")
+    except FileNotFoundError:
+        load_error = f"fichier {csv_path} introuvable"
+    except Exception as e:
+        load_error = f"erreur lors du chargement de {csv_path}: {e}"
+    else:
+        load_error = None
+    parse_s = round(time.perf_counter() - start, 6)
+    # état du cache seulement si la lecture a abouti
+    cache = None if load_error is not None else "off" if not use_cache else "hit" if CACHE_STATS["hits"] > hits else "miss"
+
+    solutions = {}  # budget -> (solution ou None, erreur, durée)
+    results = []
+    for job in jobs:
+        budget = job["budget"]
+        if budget not in solutions:
+            solution, error = None, load_error
+            start = time.perf_counter()
+            if error is None:
+                try:
+                    solution = solve_stocks(stocks, budget, reduce, reconstruct)[:3]
+                except Exception as e:
+                    error = str(e)
+            solutions[budget] = (solution, error, round(time.perf_counter() - start, 6))
+        solution, error, solve_s = solutions[budget]
+
+        record = {"job": job["job"], "csv": csv_path, "budget": budget, "parse_s": parse_s, "cache": cache, "solve_s": solve_s}
+        if error is not None:
+            record.update(status="error", error=error)
+        else:
+            r = compare_stocks(job["job"], solution, job["sienna_cost"], job["sienna_profit"], job["sienna_actions"],
+                               verbose=False)
+            record.update(
+                status="ok",
+                algo_cost=round(r["algo_cost"], 2),
+                algo_profit=round(r["algo_profit"], 2),
+                algo_actions=r["algo_actions"],
+                sienna_cost=r["sienna_cost"],
+                sienna_profit=r["sienna_profit"],
+                diff_cost=round(r["diff_cost"], 2),
+                diff_profit=round(r["diff_profit"], 2),
+            )
+        results.append(record)
+    return results
+
+def run_batch(jobs, workers=1, out=sys.stdout, reduce=False, use_cache=True, reconstruct="bitset"):
+    """Exécute les jobs sur un pool de processus et écrit un résultat JSON par ligne
+
+    Les jobs sont regroupés par CSV : chaque fichier n'est lu qu'une fois, même si
+    plusieurs budgets l'utilisent, et chaque budget distinct n'est résolu qu'une
+    fois quel que soit le nombre de portefeuilles de référence. Les CSV sont
+    répartis sur le pool et leurs résultats écrits dès qu'un CSV est terminé.
+    Renvoie le nombre de jobs en erreur.
+    """
+    groups = {}
+    for job in jobs:
+        groups.setdefault(job["csv"], []).append(job)
+    tasks = [(csv_path, group, reduce, use_cache, reconstruct) for csv_path, group in groups.items()]
+
+    errors = 0
+    def emit(results):
+        nonlocal errors
+        for record in results:
+            errors += record["status"] != "ok"
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            emit(_run_csv_jobs(task))
+    else:
+        with Pool(min(workers, len(tasks))) as pool:
+            for results in pool.imap_unordered(_run_csv_jobs, tasks):
+                emit(results)
+    return errors
+
 # ======================
 # MAIN - Exécution du programme
 # ======================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Comparaison algorithme optimisé vs Sienna")
+    parser.add_argument("--reduce", action="store_true", help="Réduit l'instance avant la DP (preprocess.py)")
+    parser.add_argument("--reconstruct", choices=["bitset", "hirschberg"], default="bitset",
+                        help="Reconstruction de la DP : bitset (n x budget / 8 octets) ou hirschberg (mémoire O(budget), plus lent)")
+    parser.add_argument("--no-cache", action="store_true", help="Relit les CSV sans passer par le cache .stock_cache")
+    parser.add_argument("--batch", metavar="MANIFEST", help="Manifeste JSON/JSONL de jobs (csv, budget, reference)")
+    parser.add_argument("--workers", "-w", type=int, default=os.cpu_count() or 1, help="Processus du mode batch")
+    parser.add_argument("--output", "-o", help="Fichier JSON lines du mode batch (stdout par défaut)")
+    args = parser.parse_args()
+    reduce = args.reduce
+    use_cache = not args.no_cache
+    reconstruct = args.reconstruct
+
+    if args.batch:
+        batch_start = time.perf_counter()
+        jobs = load_manifest(args.batch)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as out:
+                errors = run_batch(jobs, args.workers, out, reduce, use_cache, reconstruct)
+        else:
+            errors = run_batch(jobs, args.workers, sys.stdout, reduce, use_cache, reconstruct)
+        print(f"✅ {len(jobs)} job(s), {errors} erreur(s) en {time.perf_counter() - batch_start:.2f} s", file=sys.stderr)
+        sys.exit(1 if errors else 0)
+
     print("🚀 COMPARAISON ALGORITHME OPTIMISÉ vs SIENNA")
     print("=" * 60)
     
@@ -180,27 +417,18 @@ if __name__ == "__main__":
     results = []
 
     # Dataset 1 - Comparaison
-    sienna1 = {
-        "cost": 498.76,
-        "profit": 196.61,
-        "actions": ["Share-GRUT"]
-    }
+    sienna1 = SIENNA_REFERENCES["dataset1_Python+P7.csv"]
     result1 = compare_results("Dataset 1", "dataset1_Python+P7.csv",
-                             sienna1["cost"], sienna1["profit"], sienna1["actions"])
+                             sienna1["cost"], sienna1["profit"], sienna1["actions"], reduce=reduce, use_cache=use_cache,
+                             reconstruct=reconstruct)
     if result1:
         results.append(result1)
 
     # Dataset 2 - Comparaison
-    sienna2 = {
-        "cost": 489.24,
-        "profit": 193.78,
-        "actions": ["Share-ECAQ", "Share-IXCI", "Share-FWBE", "Share-ZOFA", "Share-PLLK",
-                    "Share-YFVZ", "Share-ANFX", "Share-PATS", "Share-NDKR", "Share-ALIY",
-                    "Share-JWGF", "Share-JGTW", "Share-FAPS", "Share-VCAX", "Share-LFXB",
-                    "Share-DWSK", "Share-XQII", "Share-ROOM"]
-    }
+    sienna2 = SIENNA_REFERENCES["dataset2_Python+P7.csv"]
     result2 = compare_results("Dataset 2", "dataset2_Python+P7.csv",
-                             sienna2["cost"], sienna2["profit"], sienna2["actions"])
+                             sienna2["cost"], sienna2["profit"], sienna2["actions"], reduce=reduce, use_cache=use_cache,
+                             reconstruct=reconstruct)
     if result2:
         results.append(result2)
 
@@ -212,6 +440,8 @@ if __name__ == "__main__":
             algo_better = r["algo_profit"] > r["sienna_profit"]
             status = "🏆 GAGNANT" if algo_better else "🤔 À VÉRIFIER" if r["algo_profit"] < r["sienna_profit"] else "⚖️ ÉGALITÉ"
             print(f"{r['dataset']} : {status}")
+        if use_cache:
+            print(f"💾 Cache datasets : {format_cache_stats()}")
         print("\n✅ Comparaison terminée !")
     else:
         print("❌ Aucun dataset n'a pu être traité")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vérification croisée des solveurs
+---------------------------------
+Résout les CSV livrés avec le dépôt avec chaque moteur exact (DP python et
+numpy dans tous les modes de reconstruction, branch and bound, Pareto,
+parallèle, --reduce, --stream, top-k, meet-in-the-middle sur le petit CSV) et
+compare au résultat de référence optimized.knapsack_dp :
+
+- même profit optimal ;
+- coût dans le budget ;
+- coût et profit annoncés égaux aux sommes de la sélection (sans doublon).
+
+L'FPTAS est vérifié contre sa garantie (profit >= (1 - epsilon) * optimum,
+borne supérieure >= optimum). solution_cache.SolutionCache est vérifié sur
+une suite d'éditions aléatoires (quelques lignes re-tarifées, supprimées ou
+ajoutées) : chaque réponse, en cache, incrémentale ou à froid, doit avoir le
+profit et le coût d'une résolution à froid. Les moteurs qui demandent numpy sont sautés
+sans numpy. Code de sortie 1 s'il y a au moins un désaccord.
+
+Usage:
+    python crosscheck.py [--budget 500 --budget 120] [--csv fichier.csv ...] [--cache-rounds 20]
+"""
+
+import argparse
+import random
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import bruteforce
+import optimized
+from solution_cache import SolutionCache
+
+SHIPPED_CSVS = ("Liste+d'actions+-+P7+Python+-+Feuille+1.csv", "dataset1_Python+P7.csv", "dataset2_Python+P7.csv")
+MITM_MAX_ITEMS = 40
+FPTAS_EPSILON = 0.05
+
+def _engines(csv_path: Path, stocks: List[Dict]) -> List[Tuple[str, Callable[[int], Tuple[List[Dict], int, int]]]]:
+    """(nom, solve(budget_cents) -> (sélection, coût, profit)) pour chaque moteur exact disponible."""
+    def engine(fn, **kwargs):
+        return lambda w: fn(stocks, w, **kwargs)[:3]
+
+    def reduced(w):
+        work, work_budget, expand, _ = optimized.reduce_stocks(stocks, w)
+        selection = expand(optimized.knapsack_dp(work, work_budget)[0])
+        return selection, sum(s["cost_cents"] for s in selection), sum(s["profit_cents"] for s in selection)
+
+    def top_1(w):
+        return optimized.knapsack_top_k(stocks, w, 1)[0]
+
+    engines = [
+        ("python/bitset", engine(optimized.knapsack_dp, reconstruct="bitset")),
+        ("python/hirschberg", engine(optimized.knapsack_dp, reconstruct="hirschberg")),
+        ("bnb", engine(optimized.knapsack_bnb)),
+        ("pareto", engine(optimized.knapsack_pareto)),
+        ("reduce", reduced),
+        ("top-k", top_1),
+    ]
+    if optimized.np is not None:
+        from streaming import solve_streaming
+
+        def streamed(w):
+            result = solve_streaming(csv_path, w)
+            return result["selection"], result["cost_cents"], result["profit_cents"]
+
+        engines += [
+            ("numpy/bitset", engine(optimized.knapsack_dp_numpy)),
+            ("numpy/hirschberg", engine(optimized.knapsack_dp_numpy, reconstruct="hirschberg")),
+            ("parallel", engine(optimized.knapsack_parallel, workers=2)),
+            ("stream", streamed),
+        ]
+    if len(stocks) <= MITM_MAX_ITEMS:
+        by_name = {}
+        for s in stocks:
+            by_name.setdefault((s["name"], s["cost_cents"]), []).append(s)
+
+        def mitm(w):
+            rows = [{"name": s["name"], "cost": s["cost_cents"] / 100, "profit": s["profit_cents"] / 100} for s in stocks]
+            chosen = bruteforce.meet_in_the_middle_optimize(rows, w / 100)[0]
+            unused = {key: list(group) for key, group in by_name.items()}
+            selection = [unused[(r["name"], int(round(r["cost"] * 100)))].pop() for r in chosen]
+            return selection, sum(s["cost_cents"] for s in selection), sum(s["profit_cents"] for s in selection)
+
+        engines.append(("bruteforce/mitm", mitm))
+    return engines
+
+def _problems(budget_cents: int, expected_profit: int, result) -> List[str]:
+    selection, cost_cents, profit_cents = result
+    problems = []
+    if profit_cents != expected_profit:
+        problems.append(f"profit {profit_cents} au lieu de {expected_profit}")
+    if cost_cents > budget_cents:
+        problems.append(f"coût {cost_cents} > budget {budget_cents}")
+    if sum(s["cost_cents"] for s in selection) != cost_cents or sum(s["profit_cents"] for s in selection) != profit_cents:
+        problems.append("totaux différents de la sélection")
+    keys = [s.get("row", id(s)) for s in selection]
+    if len(set(keys)) != len(keys):
+        problems.append("même ligne choisie deux fois")
+    return problems
+
+def check_csv(csv_path: Path, budgets: List[int], log=print) -> int:
+    """Nombre de désaccords sur un CSV, pour chaque budget (en centimes)."""
+    stocks = optimized.load_stocks(csv_path, use_cache=False)
+    failures = 0
+    for budget_cents in budgets:
+        _, ref_cost, ref_profit, _ = optimized.knapsack_dp(stocks, budget_cents)
+        log(f"{csv_path.name} @ {budget_cents / 100:.2f} € : référence {ref_profit / 100:.2f} € pour {ref_cost / 100:.2f} €")
+        for name, solve in _engines(csv_path, stocks):
+            problems = _problems(budget_cents, ref_profit, solve(budget_cents))
+            failures += bool(problems)
+            log(f"  {'OK' if not problems else 'ÉCHEC':5} {name}" + (f" : {'; '.join(problems)}" if problems else ""))
+        selection, cost_cents, profit_cents, upper = optimized.knapsack_fptas(stocks, budget_cents, FPTAS_EPSILON)
+        problems = _problems(budget_cents, profit_cents, (selection, cost_cents, profit_cents))
+        if profit_cents < (1 - FPTAS_EPSILON) * ref_profit or upper < ref_profit:
+            problems.append(f"profit {profit_cents} / borne {upper} hors garantie pour l'optimum {ref_profit}")
+        failures += bool(problems)
+        log(f"  {'OK' if not problems else 'ÉCHEC':5} fptas (epsilon={FPTAS_EPSILON})" + (f" : {'; '.join(problems)}" if problems else ""))
+    return failures
+
+def _edit(stocks: List[Dict], rng: random.Random, changes: int) -> List[Dict]:
+    """Copie de stocks avec quelques lignes re-tarifées, supprimées ou ajoutées."""
+    edited = [dict(s) for s in stocks]
+    for _ in range(changes):
+        kind = rng.choice(("price", "price", "remove", "add"))
+        if kind == "remove" and len(edited) > 1:
+            del edited[rng.randrange(len(edited))]
+        elif kind == "add":
+            s = dict(rng.choice(edited), name=f"Share-NEW{rng.randrange(10 ** 6)}")
+            edited.insert(rng.randrange(len(edited) + 1), s)
+        else:
+            s = edited[rng.randrange(len(edited))]
+            s["cost_cents"] = max(1, int(s["cost_cents"] * rng.uniform(0.5, 1.5)))
+            s["profit_cents"] = max(1, int(s["profit_cents"] * rng.uniform(0.5, 1.5)))
+    return edited
+
+def check_solution_cache(csv_path: Path, budget_cents: int, rounds: int, seed: int = 0, log=print) -> int:
+    """Nombre de réponses de SolutionCache différentes d'une résolution à froid sur des éditions aléatoires."""
+    rng = random.Random(seed)
+    cache = SolutionCache()
+    cold = optimized.knapsack_dp_numpy if optimized.np is not None else optimized.knapsack_dp
+    stocks = optimized.load_stocks(csv_path, use_cache=False)
+    failures = 0
+    for _ in range(rounds):
+        if rng.random() < 0.8:
+            stocks = _edit(stocks, rng, rng.randint(1, 3))
+        selection, cost_cents, profit_cents, _ = cache.solve(stocks, budget_cents, dataset=str(csv_path))
+        _, ref_cost, ref_profit, _ = cold(stocks, budget_cents)
+        problems = _problems(budget_cents, ref_profit, (selection, cost_cents, profit_cents))
+        if cost_cents != ref_cost:
+            problems.append(f"coût {cost_cents} au lieu de {ref_cost}")
+        failures += bool(problems)
+        if problems:
+            log(f"  ÉCHEC cache : {'; '.join(problems)}")
+    log(f"  {'OK' if not failures else 'ÉCHEC':5} cache de solutions ({rounds} éditions aléatoires, {cache.stats})")
+    return failures
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Vérification croisée des solveurs sur les CSV livrés")
+    parser.add_argument("--csv", nargs="*", default=None, help="CSV à vérifier (défaut : ceux du dépôt)")
+    parser.add_argument("--budget", type=float, action="append", default=None, help="Budget en € (répétable, défaut 500)")
+    parser.add_argument("--cache-rounds", type=int, default=20, help="Éditions aléatoires par CSV pour le cache de solutions (0 : sauté)")
+    args = parser.parse_args(argv)
+    here = Path(__file__).resolve().parent
+    paths = [Path(p) for p in args.csv] if args.csv else [here / name for name in SHIPPED_CSVS]
+    budgets = [int(round(b * 100)) for b in (args.budget or [optimized.DEFAULT_BUDGET_EUR])]
+
+    failures = 0
+    for path in paths:
+        if not path.exists():
+            print(f"{path} introuvable, ignoré")
+            continue
+        failures += check_csv(path, budgets)
+        if args.cache_rounds > 0:
+            failures += check_solution_cache(path, budgets[0], args.cache_rounds)
+    print("\n✅ tous les moteurs sont d'accord" if not failures else f"\n❌ {failures} désaccord(s)")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
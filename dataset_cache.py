@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Cache binaire des datasets
+--------------------------
+Garde sur disque les colonnes nettoyées de stock_loader (un fichier par CSV,
+dans .stock_cache/ à côté du CSV). La clé combine le hash du contenu du CSV,
+PARSER_VERSION et l'unité demandée : modifier le fichier ou le parseur invalide
+l'entrée. Une lecture en cache est un mmap : coûts, profits et rendements sont
+des memoryview sur le fichier, sans copie ni parsing.
+
+Format (little-endian) :
+    en-tête : magic b"STKC", version u32, n u64, taille des noms u64
+    cost_cents i64[n], profit_cents i64[n], percent f64[n], noms UTF-8 séparés par \\0
+
+Le dossier est borné à max_bytes : les entrées les moins récemment utilisées
+sont supprimées après chaque écriture. CACHE_STATS compte hits, misses et
+suppressions du processus courant.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+from stock_loader import PARSER_VERSION, StockColumns, load_columns
+
+CACHE_DIRNAME = ".stock_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_MAGIC = b"STKC"
+_HEADER = struct.Struct("<4sIQQ")
+
+CACHE_STATS = {"hits": 0, "misses": 0, "evicted": 0}
+
+def _content_key(csv_path: Path, unit: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with csv_path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    h.update(f"|parser={PARSER_VERSION}|unit={unit}".encode())
+    return h.hexdigest()
+
+def _write_entry(path: Path, cols: StockColumns) -> None:
+    names = "\0".join(cols.names).encode("utf-8")
+    costs, profits, percents = array("q", cols.cost_cents), array("q", cols.profit_cents), array("d", cols.percent)
+    if sys.byteorder != "little":
+        for a in (costs, profits, percents):
+            a.byteswap()
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    with tmp.open("wb") as f:
+        f.write(_HEADER.pack(_MAGIC, PARSER_VERSION, len(cols.names), len(names)))
+        costs.tofile(f)
+        profits.tofile(f)
+        percents.tofile(f)
+        f.write(names)
+    os.replace(tmp, path)
+
+def _read_entry(path: Path) -> StockColumns:
+    with path.open("rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, n, names_len = _HEADER.unpack_from(mm, 0)
+    if magic != _MAGIC or version != PARSER_VERSION or mm.size() != _HEADER.size + 24 * n + names_len:
+        mm.close()
+        raise ValueError(f"entrée de cache invalide: {path}")
+    view = memoryview(mm)
+    start = _HEADER.size
+    costs = view[start:start + 8 * n].cast("q")
+    profits = view[start + 8 * n:start + 16 * n].cast("q")
+    percents = view[start + 16 * n:start + 24 * n].cast("d")
+    if sys.byteorder != "little":
+        costs, profits, percents = (_swapped(v, t) for v, t in ((costs, "q"), (profits, "q"), (percents, "d")))
+    blob = bytes(view[start + 24 * n:])
+    names = blob.decode("utf-8").split("\0") if n else []
+    return StockColumns(names, costs, profits, percents)
+
+def _swapped(view: memoryview, typecode: str) -> array:
+    a = array(typecode, view)
+    a.byteswap()
+    return a
+
+def _evict(cache_dir: Path, max_bytes: int, keep: Path) -> None:
+    """Supprime les entrées les moins récemment utilisées au-delà de max_bytes."""
+    entries = []
+    for p in cache_dir.glob("*.stk"):
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, p))
+    total = sum(size for _, size, _ in entries)
+    for _, size, p in sorted(entries):
+        if total <= max_bytes:
+            break
+        if p == keep:
+            continue
+        try:
+            p.unlink()
+        except OSError:  # encore mappé ailleurs (Windows) : on réessaiera plus tard
+            continue
+        total -= size
+        CACHE_STATS["evicted"] += 1
+
+def load_columns_cached(csv_path: Path, unit: str = "auto", use_cache: bool = True,
+                        cache_dir: Path = None, max_bytes: int = DEFAULT_MAX_BYTES) -> StockColumns:
+    """Comme stock_loader.load_columns, en passant par le cache disque.
+
+    use_cache=False lit directement le CSV (ni lecture ni écriture du cache).
+    Un dossier de cache non inscriptible n'empêche pas le chargement.
+    """
+    csv_path = Path(csv_path)
+    if not use_cache:
+        return load_columns(csv_path, unit)
+    cache_dir = Path(cache_dir) if cache_dir is not None else csv_path.parent / CACHE_DIRNAME
+    entry = cache_dir / f"{_content_key(csv_path, unit)}.stk"
+
+    if entry.exists():
+        try:
+            cols = _read_entry(entry)
+        except (OSError, ValueError, struct.error):
+            pass
+        else:
+            CACHE_STATS["hits"] += 1
+            try:
+                os.utime(entry)  # date d'usage pour l'éviction LRU
+            except OSError:
+                pass
+            return cols
+
+    CACHE_STATS["misses"] += 1
+    cols = load_columns(csv_path, unit)
+    try:
+        cache_dir.mkdir(exist_ok=True)
+        _write_entry(entry, cols)
+        _evict(cache_dir, max_bytes, keep=entry)
+    except OSError:
+        pass
+    return cols
+
+def format_cache_stats() -> str:
+    return f"{CACHE_STATS['hits']} hit(s), {CACHE_STATS['misses']} miss(es), {CACHE_STATS['evicted']} eviction(s)"
@@ -1,56 +1,131 @@
 import csv
+import json
+import math
 import sys
 from pathlib import Path
 from typing import List, Dict, Tuple
 import time
 import argparse
+from bisect import bisect_left, bisect_right
+from array import array
+import heapq
+import itertools
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait as wait_processes
+from contextlib import contextmanager, nullcontext, redirect_stdout
+
+from preprocess import reduce_instance, format_stats
+from stock_loader import parse_float, UNITS
+from dataset_cache import load_columns_cached, format_cache_stats
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows: fall back to tracemalloc
+    resource = None
+
+try:
+    import numpy as np
+except ImportError:  # only required by --engine numpy
+    np = None
 
 DEFAULT_BUDGET_EUR = 500.0
 
-def parse_float(value: str) -> float:
-    s = str(value).strip()
-    s = s.replace("€", "").replace("%", "").replace("\u00A0", "").replace(" ", "")
-    s = s.replace(",", ".")
-    if s == "":
-        raise ValueError("empty")
-    return float(s)
-
-def load_stocks(csv_path: Path) -> List[Dict]:
-    stocks = []
-    with csv_path.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        fieldnames = reader.fieldnames or []
-        def find_key(poss):
-            for k in fieldnames:
-                if k is None: continue
-                kl = k.lower()
-                for p in poss:
-                    if p in kl:
-                        return k
-            raise KeyError(f"no header among {poss} found in {fieldnames}")
-        name_k = find_key(["action", "titre", "name"])
-        cost_k = find_key(["coût", "cout", "price", "prix"])
-        profit_k = find_key(["bénéfice", "benefice", "profit", "return"])
-        for row in reader:
-            try:
-                name = str(row[name_k]).strip()
-                cost = parse_float(row[cost_k])
-                percent = parse_float(row[profit_k])
-                if cost <= 0: continue
-                profit = cost * (percent / 100.0)
-                if profit <= 0: continue
-                stocks.append({
-                    "name": name,
-                    "cost_eur": round(cost, 2),
-                    "cost_cents": int(round(cost * 100)),
-                    "percent": percent,
-                    "profit_eur": round(profit, 2),
-                    "profit_cents": int(round(profit * 100)),
-                })
-            except Exception:
-                
-                continue
-    return stocks
+class PhaseProfiler:
+    """Per-phase wall time (perf_counter_ns), optional tracemalloc peak and counters.
+
+    with profiler.phase("dp_fill"): ... accumulates into the named phase; add()
+    attaches counters such as the number of DP cells evaluated. With trace_memory,
+    tracemalloc must be running: each phase records its peak above the memory in
+    use when it started (tracemalloc makes pure Python loops much slower).
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.phases: Dict[str, Dict] = {}
+
+    def _entry(self, name: str) -> Dict:
+        return self.phases.setdefault(name, {"time_ns": 0, "calls": 0, "tracemalloc_peak_bytes": None})
+
+    @contextmanager
+    def phase(self, name: str):
+        entry = self._entry(name)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter_ns()
+        try:
+            yield entry
+        finally:
+            entry["time_ns"] += time.perf_counter_ns() - start
+            entry["calls"] += 1
+            if self.trace_memory:
+                peak = tracemalloc.get_traced_memory()[1] - base
+                entry["tracemalloc_peak_bytes"] = max(peak, entry["tracemalloc_peak_bytes"] or 0)
+
+    def add(self, name: str, **counters) -> None:
+        entry = self._entry(name)
+        for key, value in counters.items():
+            entry[key] = entry.get(key, 0) + value
+
+    def as_dict(self) -> Dict:
+        phases = {}
+        for name, entry in self.phases.items():
+            data = dict(entry, time_s=entry["time_ns"] / 1e9)
+            if entry.get("cells") and entry["time_ns"]:
+                data["cells_per_s"] = entry["cells"] / (entry["time_ns"] / 1e9)
+            phases[name] = data
+        return {"total_time_s": sum(e["time_ns"] for e in self.phases.values()) / 1e9, "phases": phases}
+
+    def report(self) -> str:
+        data = self.as_dict()
+        lines = [f"{'phase':<14}{'time':>12}{'share':>8}{'peak mem':>12}  notes"]
+        total = data["total_time_s"] or 1.0
+        for name, e in data["phases"].items():
+            peak = e["tracemalloc_peak_bytes"]
+            mem = "-" if peak is None else f"{peak / (1024 * 1024):.2f} MiB"
+            notes = f"{e['cells']:,} cells, {e['cells_per_s']:,.0f} cells/s" if "cells_per_s" in e else ""
+            lines.append(f"{name:<14}{e['time_s'] * 1000:>9.3f} ms{e['time_s'] / total:>8.1%}{mem:>12}  {notes}")
+        lines.append(f"{'total':<14}{data['total_time_s'] * 1000:>9.3f} ms")
+        return "\n".join(lines)
+
+class _NoProfiler:
+    """Stand-in used when profiling is off."""
+
+    def phase(self, name: str):
+        return nullcontext()
+
+    def add(self, name: str, **counters) -> None:
+        pass
+
+NO_PROFILER = _NoProfiler()
+
+def _fill_cells(stocks: List[Dict], budget_cents: int) -> int:
+    """Number of DP cells a row-by-row fill evaluates."""
+    return sum(max(0, budget_cents + 1 - s["cost_cents"]) for s in stocks)
+
+def load_stocks(csv_path: Path, unit: str = "auto", use_cache: bool = True, profiler=NO_PROFILER) -> List[Dict]:
+    """Stocks as dicts (cents for the solvers, euros for display), via stock_loader.
+
+    The parsed columns come from the on-disk dataset cache unless use_cache is False.
+    profiler times the CSV load ("load") and the conversion to dicts ("clean").
+    """
+    with profiler.phase("load"):
+        cols = load_columns_cached(csv_path, unit, use_cache=use_cache)
+    with profiler.phase("clean"):
+        return [
+            {
+                "name": name,
+                "cost_eur": cost / 100,
+                "cost_cents": cost,
+                "percent": percent,
+                "profit_eur": profit / 100,
+                "profit_cents": profit,
+            }
+            for name, cost, profit, percent in zip(cols.names, cols.cost_cents, cols.profit_cents, cols.percent)
+        ]
 
 def best_single(stocks: List[Dict], budget_cents: int):
     best = None
@@ -60,84 +135,1343 @@ def best_single(stocks: List[Dict], budget_cents: int):
                 best = s
     return best
 
-def knapsack_dp(stocks: List[Dict], budget_cents: int) -> Tuple[List[Dict], int, int, int]:
-    
+def _fill_python(stocks: List[Dict], budget_cents: int, use_bits: bool):
+    """Fill the DP row; returns (dp, per-stock decisions as updates dicts or bitsets)."""
     dp = [0] * (budget_cents + 1)
     parents_updates = []  
 
     for idx, s in enumerate(stocks):
         c = s["cost_cents"]
         p = s["profit_cents"]
-        updates = {}
+        updates = bytearray((budget_cents >> 3) + 1) if use_bits else {}
        
         for w in range(budget_cents, c - 1, -1):
             candidate = dp[w - c] + p
             if candidate > dp[w]:
                 dp[w] = candidate
-                updates[w] = w - c
+                if use_bits:
+                    updates[w >> 3] |= 1 << (w & 7)
+                else:
+                    updates[w] = w - c
         parents_updates.append(updates)
+    return dp, parents_updates
 
-    
-    best_w = max(range(budget_cents + 1), key=lambda w: dp[w])
-    best_profit_cents = dp[best_w]
-
-    
-    w = best_w
+def _walk_back_python(stocks: List[Dict], parents_updates: List, w: int, use_bits: bool) -> List[int]:
+    """Indices of the stocks selected for budget w, in input order."""
     selected_indices = []
     for idx in range(len(stocks) - 1, -1, -1):
         updates = parents_updates[idx]
-        if w in updates:
+        if use_bits:
+            if updates[w >> 3] >> (w & 7) & 1:
+                selected_indices.append(idx)
+                w -= stocks[idx]["cost_cents"]
+        elif w in updates:
             prev_w = updates[w]
             selected_indices.append(idx)
             w = prev_w
     selected_indices.reverse()
+    return selected_indices
+
+def _fill_numpy(stocks: List[Dict], budget_cents: int):
+    """Vectorized DP fill; returns (dp, per-stock bit-packed take masks)."""
+    width = budget_cents + 1
+    dp = np.zeros(width, dtype=np.int64)
+    take_masks = []
+
+    for s in stocks:
+        c = s["cost_cents"]
+        p = s["profit_cents"]
+        if c > budget_cents:
+            take_masks.append(None)
+            continue
+        take = np.zeros(width, dtype=bool)
+        if c == 0:
+            dp += p
+            take[:] = True
+        else:
+            candidate = dp[:-c] + p
+            better = candidate > dp[c:]
+            dp[c:] = np.where(better, candidate, dp[c:])
+            take[c:] = better
+        take_masks.append(np.packbits(take))
+    return dp, take_masks
+
+def _walk_back_numpy(stocks: List[Dict], take_masks: List, w: int) -> List[int]:
+    selected_indices = []
+    for idx in range(len(stocks) - 1, -1, -1):
+        packed = take_masks[idx]
+        if packed is not None and (packed[w >> 3] >> (7 - (w & 7))) & 1:
+            selected_indices.append(idx)
+            w -= stocks[idx]["cost_cents"]
+    selected_indices.reverse()
+    return selected_indices
+
+def _selection_totals(stocks: List[Dict], selected_indices: List[int]) -> Tuple[List[Dict], int, int]:
     selection = [stocks[i] for i in selected_indices]
     total_cost_cents = sum(s["cost_cents"] for s in selection)
     total_profit_cents = sum(s["profit_cents"] for s in selection)
-    return selection, total_cost_cents, total_profit_cents, best_profit_cents
+    return selection, total_cost_cents, total_profit_cents
+
+def knapsack_dp(stocks: List[Dict], budget_cents: int, reconstruct: str = "updates", profiler=NO_PROFILER) -> Tuple[List[Dict], int, int, int]:
+    """0/1 knapsack DP over the cent grid.
+
+    reconstruct selects how the decisions are kept for rebuilding the selection:
+    "updates" (dict per stock), "bitset" (1 bit per stock and cent) or
+    "hirschberg" (divide and conquer, memory proportional to the budget only).
+    """
+    if reconstruct == "hirschberg":
+        return knapsack_hirschberg(stocks, budget_cents, _profile_python, profiler)
+    if reconstruct not in ("updates", "bitset"):
+        raise ValueError(f"unknown reconstruction mode: {reconstruct}")
+    use_bits = reconstruct == "bitset"
+
+    with profiler.phase("dp_fill"):
+        dp, parents_updates = _fill_python(stocks, budget_cents, use_bits)
+    profiler.add("dp_fill", cells=_fill_cells(stocks, budget_cents))
+
+    with profiler.phase("best_scan"):
+        best_w = max(range(budget_cents + 1), key=lambda w: dp[w])
+        best_profit_cents = dp[best_w]
+
+    with profiler.phase("reconstruct"):
+        selected_indices = _walk_back_python(stocks, parents_updates, best_w, use_bits)
+        return (*_selection_totals(stocks, selected_indices), best_profit_cents)
+
+def knapsack_dp_numpy(stocks: List[Dict], budget_cents: int, reconstruct: str = "bitset", profiler=NO_PROFILER) -> Tuple[List[Dict], int, int, int]:
+    """Same DP as knapsack_dp, one vectorized update per stock over the whole budget axis.
+
+    The per-stock "updates" dicts are replaced by a bit-packed take mask (one bit per
+    budget cell), so reconstruction walks the exact same decisions as knapsack_dp.
+    reconstruct="hirschberg" keeps only O(budget) memory instead.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required for the numpy engine (pip install numpy)")
+    if reconstruct == "hirschberg":
+        return knapsack_hirschberg(stocks, budget_cents, _profile_numpy, profiler)
+    if reconstruct != "bitset":
+        raise ValueError(f"numpy engine only supports bitset or hirschberg reconstruction, not {reconstruct}")
+
+    with profiler.phase("dp_fill"):
+        dp, take_masks = _fill_numpy(stocks, budget_cents)
+    profiler.add("dp_fill", cells=_fill_cells(stocks, budget_cents))
+
+    with profiler.phase("best_scan"):
+        best_w = int(np.argmax(dp))
+        best_profit_cents = int(dp[best_w])
+
+    with profiler.phase("reconstruct"):
+        selected_indices = _walk_back_numpy(stocks, take_masks, best_w)
+        return (*_selection_totals(stocks, selected_indices), best_profit_cents)
+
+def sweep_tables(stocks: List[Dict], budget_cents: int, engine: str = "python", profiler=NO_PROFILER):
+    """DP fill for every budget 0..budget_cents: (dp row, per-stock decisions).
+
+    Both are plain picklable values (list/bytearrays or numpy arrays), so the fill
+    can run in another process; sweep_selector turns them back into select(w).
+    """
+    if engine == "numpy":
+        if np is None:
+            raise RuntimeError("numpy is required for the numpy engine (pip install numpy)")
+        with profiler.phase("dp_fill"):
+            dp, decisions = _fill_numpy(stocks, budget_cents)
+    elif engine == "python":
+        with profiler.phase("dp_fill"):
+            dp, decisions = _fill_python(stocks, budget_cents, use_bits=True)
+    else:
+        raise ValueError(f"budget sweep needs a DP engine (python or numpy), not {engine}")
+    profiler.add("dp_fill", cells=_fill_cells(stocks, budget_cents))
+    return dp, decisions
+
+def sweep_selector(stocks: List[Dict], dp, decisions: List, budget_cents: int, engine: str = "python"):
+    """select(w) -> (selection, cost_cents, profit_cents) for any budget w <= budget_cents.
+
+    dp never decreases with w: the selection is rebuilt from the cheapest budget
+    reaching dp[w], so its cost matches a plain solve at budget w.
+    """
+    if engine == "numpy":
+        walk = lambda w: _walk_back_numpy(stocks, decisions, w)
+    else:
+        walk = lambda w: _walk_back_python(stocks, decisions, w, use_bits=True)
+
+    def select(w: int) -> Tuple[List[Dict], int, int]:
+        if not 0 <= w <= budget_cents:
+            raise ValueError(f"budget {w} cents outside the solved range 0..{budget_cents}")
+        reach = int(np.searchsorted(dp, dp[w])) if np is not None and isinstance(dp, np.ndarray) else bisect_left(dp, dp[w], 0, w)
+        return _selection_totals(stocks, walk(reach))
+
+    return select
+
+def budget_sweep(stocks: List[Dict], budget_cents: int, engine: str = "python", profiler=NO_PROFILER):
+    """Solve once for every budget from 0 to budget_cents.
+
+    The final DP row holds the best profit for each budget (cost <= w), and the kept
+    decisions rebuild the selection of any budget point without re-solving.
+    Returns (dp, select) where select(w) -> (selection, cost_cents, profit_cents).
+    """
+    dp, decisions = sweep_tables(stocks, budget_cents, engine, profiler)
+    return dp, sweep_selector(stocks, dp, decisions, budget_cents, engine)
+
+def frontier_points(dp, select, budget_cents: int, step_cents: int) -> List[Dict]:
+    """Profit-vs-budget frontier every step_cents (the full budget is always included)."""
+    budgets = list(range(0, budget_cents + 1, step_cents))
+    if budgets[-1] != budget_cents:
+        budgets.append(budget_cents)
+    points = []
+    for w in budgets:
+        selection, cost_cents, profit_cents = select(w)
+        points.append({
+            "budget_eur": w / 100,
+            "profit_eur": int(dp[w]) / 100,
+            "cost_eur": cost_cents / 100,
+            "items": len(selection),
+            "names": [s["name"] for s in selection],
+        })
+    return points
+
+def write_frontier(points: List[Dict], out) -> None:
+    """Write frontier points as JSON if out ends with .json, else as CSV (names joined by ';')."""
+    if str(getattr(out, "name", out)).lower().endswith(".json"):
+        json.dump(points, out, ensure_ascii=False, indent=2)
+        out.write("\n")
+        return
+    writer = csv.writer(out)
+    writer.writerow(["budget_eur", "profit_eur", "cost_eur", "items", "names"])
+    for p in points:
+        writer.writerow([f"{p['budget_eur']:.2f}", f"{p['profit_eur']:.2f}", f"{p['cost_eur']:.2f}", p["items"], ";".join(p["names"])])
+
+def _profile_python(stocks: List[Dict], capacity: int) -> List[int]:
+    """Best profit for every budget 0..capacity (cost <= w), one row of memory."""
+    dp = [0] * (capacity + 1)
+    for s in stocks:
+        c = s["cost_cents"]
+        p = s["profit_cents"]
+        for w in range(capacity, c - 1, -1):
+            candidate = dp[w - c] + p
+            if candidate > dp[w]:
+                dp[w] = candidate
+    return dp
+
+def _profile_numpy(stocks: List[Dict], capacity: int):
+    dp = np.zeros(capacity + 1, dtype=np.int64)
+    for s in stocks:
+        c = s["cost_cents"]
+        p = s["profit_cents"]
+        if c > capacity:
+            continue
+        if c == 0:
+            dp += p
+        else:
+            np.maximum(dp[c:], dp[:-c] + p, out=dp[c:])
+    return dp
+
+def _best_split(left, right) -> int:
+    """Budget w given to the left half maximizing left[w] + right[capacity - w]."""
+    if np is not None and isinstance(left, np.ndarray):
+        return int(np.argmax(left + right[::-1]))
+    capacity = len(left) - 1
+    return max(range(capacity + 1), key=lambda w: left[w] + right[capacity - w])
+
+def _hirschberg_select(stocks: List[Dict], indices: List[int], capacity: int, profile, selected: List[int]):
+    if not indices:
+        return
+    if len(indices) == 1:
+        if stocks[indices[0]]["cost_cents"] <= capacity:
+            selected.append(indices[0])
+        return
+    mid = len(indices) // 2
+    left, right = indices[:mid], indices[mid:]
+    left_profile = profile([stocks[i] for i in left], capacity)
+    right_profile = profile([stocks[i] for i in right], capacity)
+    split = _best_split(left_profile, right_profile)
+    del left_profile, right_profile
+    _hirschberg_select(stocks, left, split, profile, selected)
+    _hirschberg_select(stocks, right, capacity - split, profile, selected)
+
+def knapsack_hirschberg(stocks: List[Dict], budget_cents: int, profile=_profile_python, profiler=NO_PROFILER) -> Tuple[List[Dict], int, int, int]:
+    """Exact DP solve with divide-and-conquer reconstruction (Hirschberg style).
+
+    Only DP rows of size budget_cents + 1 are ever alive; the selection is rebuilt by
+    splitting the stocks in two halves, finding how the budget is shared between them
+    and recursing. Costs about log2(n) times the DP fill, returns an optimal selection
+    with the same profit and cost as knapsack_dp (ties may pick different stocks).
+    """
+    with profiler.phase("dp_fill"):
+        dp = profile(stocks, budget_cents)
+    profiler.add("dp_fill", cells=_fill_cells(stocks, budget_cents))
+    with profiler.phase("best_scan"):
+        if np is not None and isinstance(dp, np.ndarray):
+            best_w = int(np.argmax(dp))
+        else:
+            best_w = max(range(budget_cents + 1), key=dp.__getitem__)
+        best_profit_cents = int(dp[best_w])
+    del dp
+
+    with profiler.phase("reconstruct"):
+        selected_indices: List[int] = []
+        _hirschberg_select(stocks, list(range(len(stocks))), best_w, profile, selected_indices)
+        selected_indices.sort()
+        selection = [stocks[i] for i in selected_indices]
+        total_cost_cents = sum(s["cost_cents"] for s in selection)
+        total_profit_cents = sum(s["profit_cents"] for s in selection)
+        return selection, total_cost_cents, total_profit_cents, best_profit_cents
+
+def _bnb_search(stocks: List[Dict], budget_cents: int, node_limit: int = None, time_limit: float = None) -> Tuple[List[int], int, int]:
+    """branch_and_bound on positions: (sorted indices of the best selection, upper bound, nodes)."""
+    order = sorted(
+        (i for i, s in enumerate(stocks) if s["cost_cents"] <= budget_cents),
+        key=lambda i: (-stocks[i]["profit_cents"] / stocks[i]["cost_cents"]) if stocks[i]["cost_cents"] else float("-inf"),
+    )
+    costs = [stocks[i]["cost_cents"] for i in order]
+    profits = [stocks[i]["profit_cents"] for i in order]
+    n = len(order)
+    prefix_cost = [0] * (n + 1)
+    prefix_profit = [0] * (n + 1)
+    for k in range(n):
+        prefix_cost[k + 1] = prefix_cost[k] + costs[k]
+        prefix_profit[k + 1] = prefix_profit[k] + profits[k]
+
+    def upper_bound(i: int, cap: int, profit: int) -> int:
+        # greedy fill from i in ratio order, plus the fractional part of the break item
+        k = bisect_right(prefix_cost, prefix_cost[i] + cap, i) - 1
+        bound = profit + prefix_profit[k] - prefix_profit[i]
+        if k < n:
+            bound += (cap - (prefix_cost[k] - prefix_cost[i])) * profits[k] // costs[k]
+        return bound
+
+    # greedy incumbent: ratio order, skipping stocks that no longer fit
+    best_profit, best_path, cap = 0, None, budget_cents
+    for k in range(n):
+        if costs[k] <= cap:
+            cap -= costs[k]
+            best_profit += profits[k]
+            best_path = (k, best_path)
+
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    nodes = 0
+    # a path is a persistent linked list (position, parent) of the positions taken
+    stack = [(0, budget_cents, 0, None)]
+    while stack:
+        if (node_limit is not None and nodes >= node_limit) or (
+            deadline is not None and nodes % 1024 == 0 and time.perf_counter() > deadline
+        ):
+            break
+        i, cap, profit, path = stack.pop()
+        nodes += 1
+        if profit > best_profit:
+            best_profit, best_path = profit, path
+        while i < n and costs[i] > cap:
+            i += 1
+        if i == n or upper_bound(i, cap, profit) <= best_profit:
+            continue
+        stack.append((i + 1, cap, profit, path))
+        stack.append((i + 1, cap - costs[i], profit + profits[i], (i, path)))
+
+    bound = best_profit
+    for i, cap, profit, _ in stack:
+        while i < n and costs[i] > cap:
+            i += 1
+        bound = max(bound, profit if i == n else upper_bound(i, cap, profit))
+
+    selected_indices = []
+    while best_path is not None:
+        k, best_path = best_path
+        selected_indices.append(order[k])
+    selected_indices.sort()
+    return selected_indices, bound, nodes
+
+def branch_and_bound(stocks: List[Dict], budget_cents: int, node_limit: int = None, time_limit: float = None) -> Tuple[List[Dict], int, int, int, int]:
+    """Exact depth-first branch and bound, independent of the budget granularity.
+
+    Stocks are explored by decreasing profit/cost ratio, taking a stock before leaving
+    it out, and a node is pruned when its fractional (Dantzig) bound cannot beat the
+    best selection found so far. If node_limit or time_limit (seconds) stops the
+    search early, the best selection found is returned together with the best
+    remaining bound, so the optimality gap is upper_bound - profit.
+
+    Returns (selection, total_cost_cents, total_profit_cents, upper_bound_cents, nodes).
+    """
+    selected_indices, bound, nodes = _bnb_search(stocks, budget_cents, node_limit, time_limit)
+    return (*_selection_totals(stocks, selected_indices), bound, nodes)
+
+def knapsack_bnb(stocks: List[Dict], budget_cents: int, profiler=NO_PROFILER) -> Tuple[List[Dict], int, int, int]:
+    """branch_and_bound without limits, with the same return shape as knapsack_dp."""
+    with profiler.phase("search"):
+        selection, total_cost_cents, total_profit_cents, _, _ = branch_and_bound(stocks, budget_cents)
+    return selection, total_cost_cents, total_profit_cents, total_profit_cents
+
+def _fill_min_cost_python(costs: List[int], profits: List[int], top: int):
+    """min_cost[q] = cheapest cost reaching a (scaled) profit of at least q, for q in 0..top."""
+    inf = float("inf")
+    min_cost = [0] + [inf] * top
+    takes = []
+    for c, p in zip(costs, profits):
+        take = bytearray((top >> 3) + 1)
+        for q in range(top, 0, -1):
+            candidate = min_cost[q - p if q > p else 0] + c
+            if candidate < min_cost[q]:
+                min_cost[q] = candidate
+                take[q >> 3] |= 1 << (q & 7)
+        takes.append(take)
+    return min_cost, takes, lambda take, q: take[q >> 3] >> (q & 7) & 1
+
+def _fill_min_cost_numpy(costs: List[int], profits: List[int], top: int):
+    inf = np.iinfo(np.int64).max // 2
+    min_cost = np.full(top + 1, inf, dtype=np.int64)
+    min_cost[0] = 0
+    takes = []
+    for c, p in zip(costs, profits):
+        candidate = np.empty(top + 1, dtype=np.int64)
+        candidate[:p + 1] = c  # q <= p: the stock alone is enough
+        candidate[p + 1:] = min_cost[1:top + 1 - p] + c
+        better = candidate < min_cost
+        better[0] = False
+        np.minimum(min_cost, candidate, out=min_cost)
+        min_cost[0] = 0
+        takes.append(np.packbits(better))
+    return min_cost, takes, lambda take, q: (take[q >> 3] >> (7 - (q & 7))) & 1
+
+def knapsack_fptas(stocks: List[Dict], budget_cents: int, epsilon: float = 0.1, profiler=NO_PROFILER) -> Tuple[List[Dict], int, int, int]:
+    """Approximate solve whose cost does not depend on the budget (profit-scaling FPTAS).
+
+    Profits are divided by K = epsilon * LB / m (LB: greedy lower bound, m: most stocks
+    that can fit together) and a min-cost DP runs over the scaled profits, capped at
+    UB / K where UB is the LP (Dantzig) bound. Losing less than K per selected stock,
+    the selection is worth at least (1 - epsilon) * optimum. Time and memory are
+    O(n * m * UB / (epsilon * LB)) = O(n * m / epsilon) since UB <= 2 * LB.
+
+    Returns (selection, total_cost_cents, total_profit_cents, upper_bound_cents), where
+    upper_bound is a proven bound on the optimum (min of the LP bound and the scaled DP
+    bound), so upper_bound - profit is a certified gap.
+    """
+    if not 0 < epsilon < 1:
+        raise ValueError(f"epsilon must be between 0 and 1, not {epsilon}")
+    fitting = [i for i, s in enumerate(stocks) if s["cost_cents"] <= budget_cents]
+    if not fitting:
+        return [], 0, 0, 0
+    with profiler.phase("bounds"):
+        greedy_indices, lp_bound, _ = _bnb_search(stocks, budget_cents, node_limit=0)
+        greedy_profit = sum(stocks[i]["profit_cents"] for i in greedy_indices)
+        single = max((stocks[i] for i in fitting), key=lambda s: s["profit_cents"])
+        lower = max(greedy_profit, single["profit_cents"])
+        # m: largest number of stocks fitting together (cheapest first)
+        m, spent = 0, 0
+        for c in sorted(stocks[i]["cost_cents"] for i in fitting):
+            if spent + c > budget_cents:
+                break
+            spent += c
+            m += 1
+
+    scale = max(1.0, epsilon * lower / m)
+    costs = [stocks[i]["cost_cents"] for i in fitting]
+    scaled = [int(stocks[i]["profit_cents"] // scale) for i in fitting]
+    top = min(int(lp_bound // scale), sum(scaled))
+    fill = _fill_min_cost_numpy if np is not None else _fill_min_cost_python
+    with profiler.phase("dp_fill"):
+        min_cost, takes, taken = fill(costs, scaled, top)
+    profiler.add("dp_fill", cells=len(fitting) * (top + 1))
+
+    with profiler.phase("best_scan"):
+        best_q = max(q for q in range(top + 1) if min_cost[q] <= budget_cents)
+
+    with profiler.phase("reconstruct"):
+        selected_indices, q = [], best_q
+        for k in range(len(fitting) - 1, -1, -1):
+            if q > 0 and taken(takes[k], q):
+                selected_indices.append(fitting[k])
+                q = max(0, q - scaled[k])
+        selected_indices.sort()
+        selection, total_cost_cents, total_profit_cents = _selection_totals(stocks, selected_indices)
+        if total_profit_cents < greedy_profit:  # never worse than the greedy incumbent
+            selection, total_cost_cents, total_profit_cents = _selection_totals(stocks, greedy_indices)
+
+    if scale == 1.0:
+        # integer profits, no rounding: the DP was exact
+        upper_bound = max(total_profit_cents, best_q)
+    else:
+        # each stock of an optimal set loses less than `scale` to rounding
+        upper_bound = min(lp_bound, math.ceil(scale * (best_q + m)))
+    return selection, total_cost_cents, total_profit_cents, max(upper_bound, total_profit_cents)
+
+def knapsack_pareto(stocks: List[Dict], budget_cents: int, profiler=NO_PROFILER) -> Tuple[List[Dict], int, int, int]:
+    """Sparse DP over the Pareto frontier of (cost, profit) states (Nemhauser-Ullmann).
+
+    The frontier is the list of reachable states sorted by cost with strictly increasing
+    profit (every other state is dominated). Each stock is merged in one linear pass
+    over the frontier and its copy shifted by (cost, profit), so the work follows the
+    frontier size instead of the budget: nothing is indexed by cent, and costs may be
+    any integers (finer units than cents only need a matching budget). Stocks are
+    merged by decreasing cost, which keeps the intermediate frontiers smallest.
+    Each state keeps a persistent (stock, parent) link for reconstruction.
+    """
+    order = sorted((i for i, s in enumerate(stocks) if s["cost_cents"] <= budget_cents),
+                   key=lambda i: -stocks[i]["cost_cents"])
+    with profiler.phase("dp_fill"):
+        costs, profits, links = [0], [0], [None]
+        states = 0
+        for idx in order:
+            c, p = stocks[idx]["cost_cents"], stocks[idx]["profit_cents"]
+            shifted = bisect_right(costs, budget_cents - c)
+            new_costs, new_profits, new_links = [], [], []
+            i = j = 0
+            m = len(costs)
+            last = -1
+            while j < shifted:
+                shifted_cost = costs[j] + c
+                if i < m and (costs[i] < shifted_cost or (costs[i] == shifted_cost and profits[i] >= profits[j] + p)):
+                    if profits[i] > last:
+                        last = profits[i]
+                        new_costs.append(costs[i])
+                        new_profits.append(last)
+                        new_links.append(links[i])
+                    i += 1
+                else:
+                    if profits[j] + p > last:
+                        last = profits[j] + p
+                        new_costs.append(shifted_cost)
+                        new_profits.append(last)
+                        new_links.append((idx, links[j]))
+                    j += 1
+            for i in range(i, m):
+                if profits[i] > last:
+                    last = profits[i]
+                    new_costs.append(costs[i])
+                    new_profits.append(last)
+                    new_links.append(links[i])
+            costs, profits, links = new_costs, new_profits, new_links
+            states += len(costs)
+    profiler.add("dp_fill", cells=states)
+
+    with profiler.phase("best_scan"):
+        # the last state has the best profit, and the lowest cost among equal profits
+        best_profit_cents, link = profits[-1], links[-1]
+
+    with profiler.phase("reconstruct"):
+        selected_indices = []
+        while link is not None:
+            idx, link = link
+            selected_indices.append(idx)
+        selected_indices.sort()
+        return (*_selection_totals(stocks, selected_indices), best_profit_cents)
+
+def knapsack_constrained(stocks: List[Dict], budget_cents: int, max_items: int = None, group_key=None,
+                         group_caps=None, profiler=NO_PROFILER) -> Tuple[List[Dict], int, int, int]:
+    """Exact DP with a cap on the number of selected stocks and/or per group.
+
+    group_key(stock) names the group of a stock and group_caps is either one cap for
+    every group or a dict {group: cap} (groups missing from the dict are not capped).
+    Stocks are processed group by group, and the DP state adds two count axes to the
+    budget axis: stocks selected so far (only up to min(max_items, stocks that can fit
+    together, stocks seen so far) — the reachable counts) and stocks selected in the
+    current group (reset at each group boundary, after keeping the best of each count).
+    Rows are rolled, only take bits are kept per stock: time and memory are those of
+    the numpy engine times (max_items + 1) * (largest binding group cap + 1), a cap
+    being binding only below both the total cap and the most stocks of its group
+    that fit in the budget.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required for constrained solves (pip install numpy)")
+    if max_items is not None and max_items < 0:
+        raise ValueError(f"max_items must be >= 0, not {max_items}")
+    fitting = [i for i, s in enumerate(stocks) if s["cost_cents"] <= budget_cents]
+    cap_of = lambda g: None
+    if group_caps is not None:
+        if group_key is None:
+            raise ValueError("group caps need a group_key")
+        cap_of = (lambda g: group_caps.get(g)) if isinstance(group_caps, dict) else (lambda g: group_caps)
+        fitting.sort(key=lambda i: group_key(stocks[i]))  # stable: input order within a group
+
+    m, spent = 0, 0  # most stocks that can fit together
+    for c in sorted(stocks[i]["cost_cents"] for i in fitting):
+        if spent + c > budget_cents:
+            break
+        spent += c
+        m += 1
+    k_max = m if max_items is None else min(max_items, m)
+    count_axis = max_items is not None
+    kd = k_max + 1 if count_axis else 1
+    groups = []  # (first position, last position + 1, cap)
+    for pos, i in enumerate(fitting):
+        g = group_key(stocks[i]) if group_caps is not None else None
+        if not groups or groups[-1][3] != g:
+            groups.append([pos, pos, cap_of(g), g])
+        groups[-1][1] = pos + 1
+    for group in groups:
+        # a cap only binds below the most stocks of the group that fit together (and below
+        # the total cap): otherwise the group needs no in-group count axis at all
+        first, last, cap, _ = group
+        if cap is not None:
+            m_g, spent = 0, 0
+            for c in sorted(stocks[i]["cost_cents"] for i in fitting[first:last]):
+                if spent + c > budget_cents:
+                    break
+                spent += c
+                m_g += 1
+            group[2] = cap if cap < min(m_g, k_max) else None
+    gd = 1 + max((cap for _, _, cap, _ in groups if cap is not None), default=0)
+    width = budget_cents + 1
+    unreachable = np.iinfo(np.int64).min // 2
+
+    with profiler.phase("dp_fill"):
+        # state[k, j, w]: best profit with k stocks in total, j in the current group, cost <= w
+        state = np.full((kd, gd, width), unreachable, dtype=np.int64)
+        state[0, 0, :] = 0
+        takes, boundaries = [], []
+        seen = 0
+        cells = 0
+        for first, last, cap, _ in groups:
+            # close the previous group: keep the best over its in-group counts
+            if gd > 1:
+                collapsed = state.max(axis=1)
+                boundaries.append(np.argmax(state, axis=1).astype(np.int16))
+                state[:] = unreachable
+                state[:, 0, :] = collapsed
+            else:
+                boundaries.append(None)
+            j_cap = gd - 1 if cap is None else min(cap, gd - 1)
+            in_group = cap is not None
+            for pos in range(first, last):
+                s = stocks[fitting[pos]]
+                c, p = s["cost_cents"], s["profit_cents"]
+                seen += 1
+                k_hi = min(kd - 1, seen) if count_axis else 0
+                j_hi = min(j_cap, pos - first + 1) if in_group else 0
+                if (count_axis and k_hi == 0) or (in_group and j_hi == 0):
+                    takes.append(None)
+                    continue
+                # from (k - 1, j - 1, w - c) to (k, j, w), counts moving only on the capped axes
+                k0 = 1 if count_axis else 0
+                j0 = 1 if in_group else 0
+                candidate = state[k0 - k0:k_hi + 1 - k0, j0 - j0:j_hi + 1 - j0, :width - c] + p
+                target = state[k0:k_hi + 1, j0:j_hi + 1, c:]
+                better = candidate > target
+                np.maximum(target, candidate, out=target)
+                cells += better.size
+                # bits of the updated block only: (first k, first j, shape, packed)
+                takes.append((k0, j0, better.shape, np.packbits(better)))
+    profiler.add("dp_fill", cells=cells)
+
+    with profiler.phase("best_scan"):
+        flat = int(np.argmax(state))
+        k, j, w = np.unravel_index(flat, state.shape)
+        k, j, w = int(k), int(j), int(w)
+        best_profit_cents = int(state[k, j, w])
+        # lowest budget reaching the best profit, as the unconstrained engines
+        reach = np.nonzero((state == best_profit_cents).any(axis=(0, 1)))[0]
+        w = int(reach[0])
+        k, j = (int(x) for x in np.argwhere(state[:, :, w] == best_profit_cents)[0])
+
+    with profiler.phase("reconstruct"):
+        selected_indices = []
+        for g in range(len(groups) - 1, -1, -1):
+            first, last, cap, _ = groups[g]
+            for pos in range(last - 1, first - 1, -1):
+                if takes[pos] is None:
+                    continue
+                k0, j0, (nk, nj, nw), packed = takes[pos]
+                c = stocks[fitting[pos]]["cost_cents"]
+                if not (k0 <= k < k0 + nk and j0 <= j < j0 + nj and w >= c):
+                    continue
+                flat_bit = ((k - k0) * nj + (j - j0)) * nw + (w - c)
+                if (packed[flat_bit >> 3] >> (7 - (flat_bit & 7))) & 1:
+                    selected_indices.append(fitting[pos])
+                    w -= stocks[fitting[pos]]["cost_cents"]
+                    if count_axis:
+                        k -= 1
+                    if cap is not None:
+                        j -= 1
+            j = int(boundaries[g][k, w]) if boundaries[g] is not None else 0
+        selected_indices.sort()
+        return (*_selection_totals(stocks, selected_indices), best_profit_cents)
+
+def _binary_pieces(units: int) -> List[int]:
+    """Split a unit limit into 1, 2, 4, ..., rest: every count 0..units is a sum of distinct pieces."""
+    pieces, size = [], 1
+    while units > 0:
+        take = min(size, units)
+        pieces.append(take)
+        units -= take
+        size *= 2
+    return pieces
+
+def knapsack_bounded(stocks: List[Dict], budget_cents: int, max_units, engine=None,
+                     profiler=NO_PROFILER) -> Tuple[List[Dict], int, int, int, List[int]]:
+    """Bounded knapsack: up to max_units units of each stock (an int, or a list aligned with stocks).
+
+    Each stock's limit u (capped at budget // cost) is split in binary pieces of
+    1, 2, 4, ... units, solved as a 0/1 problem by engine (knapsack_dp_numpy when
+    numpy is available, else knapsack_dp), so a stock costs about log2(u) items of
+    DP instead of u copies. The pieces chosen are summed back per stock.
+
+    Returns (selection, total_cost_cents, total_profit_cents, best_profit_cents, units)
+    where units[i] is the number of units bought of selection[i].
+    """
+    if engine is None:
+        engine = knapsack_dp_numpy if np is not None else knapsack_dp
+    limits = max_units if isinstance(max_units, (list, tuple)) else [max_units] * len(stocks)
+    pieces, owner = [], []
+    for idx, (s, limit) in enumerate(zip(stocks, limits)):
+        if limit is None or limit < 0:
+            raise ValueError(f"invalid unit limit {limit!r} for {s['name']}")
+        c = s["cost_cents"]
+        limit = min(limit, budget_cents // c) if c else limit
+        for k in _binary_pieces(limit):
+            pieces.append({"name": s["name"], "cost_cents": c * k, "profit_cents": s["profit_cents"] * k, "units": k})
+            owner.append(idx)
+    chosen, _, _, best_profit_cents = engine(pieces, budget_cents, profiler=profiler)
+
+    counts: Dict[int, int] = {}
+    position = {id(piece): i for i, piece in enumerate(pieces)}
+    for piece in chosen:
+        idx = owner[position[id(piece)]]
+        counts[idx] = counts.get(idx, 0) + piece["units"]
+    order = sorted(counts)
+    selection = [stocks[i] for i in order]
+    units = [counts[i] for i in order]
+    total_cost_cents = sum(s["cost_cents"] * u for s, u in zip(selection, units))
+    total_profit_cents = sum(s["profit_cents"] * u for s, u in zip(selection, units))
+    return selection, total_cost_cents, total_profit_cents, best_profit_cents, units
+
+def load_max_units(csv_path: Path, column: str, stocks: List[Dict]) -> List[int]:
+    """Per-stock unit limits read from a CSV column, matched to the stocks by name (default 1)."""
+    limits: Dict[str, int] = {}
+    with Path(csv_path).open(newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        lowered = [h.strip().lower() for h in header]
+        if column.lower() not in lowered:
+            raise KeyError(f"Colonne manquante: {column} parmi {header}")
+        col = lowered.index(column.lower())
+        name_col = next(i for i, h in enumerate(lowered) if any(k in h for k in ("action", "titre", "name")))
+        for row in reader:
+            if len(row) > max(col, name_col):
+                try:
+                    limits[row[name_col].strip()] = int(parse_float(row[col]))
+                except ValueError:
+                    continue
+    return [limits.get(s["name"], 1) for s in stocks]
+
+def _parallel_blocks(costs: List[int], width: int) -> List[Tuple[int, int, int]]:
+    """Group consecutive stocks into blocks whose total cost (the halo) stays under width/2."""
+    blocks, start, halo = [], 0, 0
+    for i, c in enumerate(costs):
+        if i > start and (halo + c > width // 2 or i - start >= 64):
+            blocks.append((start, i, halo))
+            start, halo = i, 0
+        halo += c
+    if start < len(costs):
+        blocks.append((start, len(costs), halo))
+    return blocks
+
+def _parallel_fill_worker(names: Tuple[str, str, str], n: int, budget_cents: int, costs: List[int], profits: List[int],
+                          blocks: List[Tuple[int, int, int]], lo: int, hi: int, barrier) -> None:
+    """Fill the budget range [lo, hi) for every stock, block by block (see knapsack_parallel)."""
+    width, nbytes = budget_cents + 1, (budget_cents >> 3) + 1
+    shms = []
+    try:
+        shms.extend(shared_memory.SharedMemory(name=name) for name in names)
+        rows = [np.ndarray((width,), dtype=np.int64, buffer=shms[0].buf),
+                np.ndarray((width,), dtype=np.int64, buffer=shms[1].buf)]
+        bits = np.ndarray((n, nbytes), dtype=np.uint8, buffer=shms[2].buf)
+        current = 0
+        for start, stop, halo in blocks:
+            # stocks start..stop-1 only look back by their total cost: recompute that halo
+            # locally, the values in [lo, hi) are then exact without reading other ranges
+            a = max(0, lo - halo)
+            buf = rows[current][a:hi].copy()
+            for i in range(start, stop):
+                c, p = costs[i], profits[i]
+                if c >= hi - a:
+                    continue
+                candidate = buf[:-c] + p if c else buf + p
+                better = candidate > buf[c:]
+                np.maximum(buf[c:], candidate, out=buf[c:])
+                own = max(lo, a + c)  # first owned budget where this stock was evaluated
+                take = np.zeros(hi - lo, dtype=bool)
+                take[own - lo:] = better[own - a - c:]
+                bits[i, lo >> 3:(hi + 7) >> 3] = np.packbits(take)
+            rows[1 - current][lo:hi] = buf[lo - a:]
+            current = 1 - current
+            barrier.wait()
+    except BaseException:
+        # release the other workers: they get BrokenBarrierError instead of waiting forever
+        barrier.abort()
+        raise
+    finally:
+        for shm in shms:
+            shm.close()
+
+def knapsack_parallel(stocks: List[Dict], budget_cents: int, workers: int = None, profiler=NO_PROFILER) -> Tuple[List[Dict], int, int, int]:
+    """Multi-process version of knapsack_dp_numpy (same result and bitset reconstruction).
+
+    Each worker process owns a slice of the budget axis of the DP rows kept in shared
+    memory. Stocks are processed in blocks: for a block, a worker copies its slice plus
+    a halo of the block's total cost on its left, applies the block's stocks locally,
+    writes its slice to the other row buffer and waits on a barrier, so there is one
+    synchronization per block instead of per stock. Take bits go to a shared bitset
+    (n * budget / 8 bytes, as for the numpy engine). Worth it when budget / workers is
+    large compared to the stock costs (hundreds of thousands of cents); below that the
+    halos and barriers cost more than they save.
+    """
+    if np is None:
+        raise RuntimeError("numpy is required for the parallel engine (pip install numpy)")
+    workers = workers or os.cpu_count() or 1
+    fitting = [i for i, s in enumerate(stocks) if s["cost_cents"] <= budget_cents]
+    work = [stocks[i] for i in fitting]
+    n, width = len(work), budget_cents + 1
+    # owned ranges start on byte boundaries so that workers never share a bitset byte
+    step = -(-width // (8 * workers)) * 8
+    ranges = [(lo, min(width, lo + step)) for lo in range(0, width, step)]
+    if n == 0 or len(ranges) == 1:
+        selection, cost, profit, best = knapsack_dp_numpy(work, budget_cents, profiler=profiler)
+        return selection, cost, profit, best
+
+    costs = [s["cost_cents"] for s in work]
+    profits = [s["profit_cents"] for s in work]
+    blocks = _parallel_blocks(costs, step)
+    nbytes = (budget_cents >> 3) + 1
+    shms = [shared_memory.SharedMemory(create=True, size=8 * width) for _ in range(2)]
+    shms.append(shared_memory.SharedMemory(create=True, size=max(1, n * nbytes)))
+    try:
+        with profiler.phase("dp_fill"):
+            for shm in shms[:2]:
+                np.ndarray((width,), dtype=np.int64, buffer=shm.buf)[:] = 0
+            ctx = mp.get_context("spawn")
+            barrier = ctx.Barrier(len(ranges))
+            names = tuple(shm.name for shm in shms)
+            procs = [ctx.Process(target=_parallel_fill_worker,
+                                 args=(names, n, budget_cents, costs, profits, blocks, lo, hi, barrier))
+                     for lo, hi in ranges]
+            try:
+                for proc in procs:
+                    proc.start()
+                # a worker killed from outside (OOM killer...) cannot abort the barrier itself:
+                # as soon as one exits with an error, the others are terminated below
+                while True:
+                    alive = [proc for proc in procs if proc.is_alive()]
+                    if not alive or any(proc.exitcode not in (None, 0) for proc in procs):
+                        break
+                    wait_processes([proc.sentinel for proc in alive], timeout=1.0)
+            finally:
+                for proc in procs:
+                    if proc.is_alive():
+                        proc.terminate()
+                        proc.join()
+            if any(proc.exitcode != 0 for proc in procs):
+                raise RuntimeError("a parallel DP worker failed")
+        profiler.add("dp_fill", cells=_fill_cells(work, budget_cents))
+
+        with profiler.phase("best_scan"):
+            dp = np.ndarray((width,), dtype=np.int64, buffer=shms[len(blocks) % 2].buf)
+            best_w = int(np.argmax(dp))
+            best_profit_cents = int(dp[best_w])
+            del dp
+
+        with profiler.phase("reconstruct"):
+            bits = np.ndarray((n, nbytes), dtype=np.uint8, buffer=shms[2].buf)
+            selected_indices = []
+            w = best_w
+            for i in range(n - 1, -1, -1):
+                if (bits[i, w >> 3] >> (7 - (w & 7))) & 1:
+                    selected_indices.append(fitting[i])
+                    w -= costs[i]
+            del bits
+            return (*_selection_totals(stocks, sorted(selected_indices)), best_profit_cents)
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+
+def _value_table_python(stocks: List[Dict], budget_cents: int) -> List[array]:
+    """table[i][w] = best profit using the first i stocks with a budget of w (all rows kept)."""
+    row = array("q", bytes(8 * (budget_cents + 1)))
+    table = [row]
+    for s in stocks:
+        c, p = s["cost_cents"], s["profit_cents"]
+        row = array("q", row)
+        for w in range(budget_cents, c - 1, -1):
+            candidate = row[w - c] + p
+            if candidate > row[w]:
+                row[w] = candidate
+        table.append(row)
+    return table
+
+def _value_table_numpy(stocks: List[Dict], budget_cents: int):
+    total = sum(s["profit_cents"] for s in stocks)
+    dtype = np.int32 if total < 2 ** 31 else np.int64
+    table = np.zeros((len(stocks) + 1, budget_cents + 1), dtype=dtype)
+    for i, s in enumerate(stocks):
+        c, p = s["cost_cents"], s["profit_cents"]
+        table[i + 1] = table[i]
+        if c == 0:
+            table[i + 1] += p
+        else:
+            np.maximum(table[i][c:], table[i][:-c] + p, out=table[i + 1][c:])
+    return table
+
+def knapsack_top_k(stocks: List[Dict], budget_cents: int, k: int, engine: str = "python", profiler=NO_PROFILER) -> List[Tuple[List[Dict], int, int]]:
+    """The k best distinct selections, as (selection, cost_cents, profit_cents) by decreasing profit.
+
+    One DP fill keeps every row of the table (table[i][w] = best profit of the first i
+    stocks within w), then a best-first search walks decisions from the last stock to
+    the first with priority "profit so far + table[i][w]": the table is an exact bound,
+    so complete selections come out in decreasing profit order and the search stops
+    after the k-th one.
+
+    Time: the DP fill, O(n * budget), plus O(k * n * log(k * n)) for the enumeration
+    (more when many selections tie with the k-th profit). Memory: the full table,
+    n * (budget + 1) integers (int32 with numpy when profits allow), plus O(k * n) for
+    the search frontier. Equal profits are ranked by lower cost when the search meets
+    them at the same time.
+    """
+    if k < 1:
+        raise ValueError(f"k must be >= 1, not {k}")
+    fitting = [i for i, s in enumerate(stocks) if s["cost_cents"] <= budget_cents]
+    work = [stocks[i] for i in fitting]
+    with profiler.phase("dp_fill"):
+        if engine == "numpy":
+            if np is None:
+                raise RuntimeError("numpy is required for the numpy engine (pip install numpy)")
+            table = _value_table_numpy(work, budget_cents)
+        else:
+            table = _value_table_python(work, budget_cents)
+    profiler.add("dp_fill", cells=_fill_cells(work, budget_cents))
+
+    with profiler.phase("reconstruct"):
+        results = []
+        n = len(work)
+        tie = 0
+        # (-bound, cost so far, tie, i, w, profit so far, path); path = (index, parent) linked list
+        heap = [(-int(table[n][budget_cents]), 0, tie, n, budget_cents, 0, None)]
+        while heap and len(results) < k:
+            _, cost, _, i, w, profit, path = heapq.heappop(heap)
+            if i == 0:
+                selected_indices = []
+                while path is not None:
+                    idx, path = path
+                    selected_indices.append(fitting[idx])
+                results.append(_selection_totals(stocks, sorted(selected_indices)))
+                continue
+            s = work[i - 1]
+            tie += 1
+            heapq.heappush(heap, (-(profit + int(table[i - 1][w])), cost, tie, i - 1, w, profit, path))
+            c = s["cost_cents"]
+            if c <= w:
+                tie += 1
+                taken = profit + s["profit_cents"]
+                heapq.heappush(heap, (-(taken + int(table[i - 1][w - c])), cost + c, tie, i - 1, w - c, taken, (i - 1, path)))
+    return results
+
+ENGINES = {
+    "python": knapsack_dp,
+    "numpy": knapsack_dp_numpy,
+    "bnb": knapsack_bnb,
+    "pareto": knapsack_pareto,
+    "parallel": knapsack_parallel,
+}
+
+def reduce_stocks(stocks: List[Dict], budget_cents: int):
+    """Apply preprocess.reduce_instance to stock dicts.
+
+    Returns (work, work_budget, expand, stats): work are copies of the kept stocks with
+    cost_cents divided by the GCD, and expand(selection) maps a selection of work
+    stocks back to the original dicts, adding the stocks fixed in by the reduction.
+    """
+    reduction = reduce_instance(
+        [s["name"] for s in stocks], [s["cost_cents"] for s in stocks], [s["profit_cents"] for s in stocks], budget_cents)
+    scale = reduction["scale"]
+    work = [dict(stocks[i], cost_cents=stocks[i]["cost_cents"] // scale) for i in reduction["kept"]]
+    originals = {id(w): i for w, i in zip(work, reduction["kept"])}
+    fixed_in = reduction["fixed_in"]
+
+    def expand(selection: List[Dict]) -> List[Dict]:
+        return [stocks[i] for i in sorted([originals[id(s)] for s in selection] + fixed_in)]
+
+    return work, reduction["budget"], expand, reduction["stats"]
+
+def peak_memory_bytes():
+    """Peak memory of the process: max RSS when available, else the tracemalloc peak."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1]
+    return None
 
 def format_eur_cents(cents: int) -> str:
     return f"{cents/100:.2f} €"
 
+def run_stress(args, csv_path: Path, stocks: List[Dict], portfolios: List[Tuple[str, List[Dict], List[int]]], profiler) -> None:
+    """Stress-test the solved portfolios (and Sienna's reference for this dataset) with stress_test.py."""
+    from stress_test import stress_portfolios, format_stress
+    from comparison_results import SIENNA_REFERENCES
+
+    # keyed by row index: two rows may share a name with different costs and returns
+    row_of = {id(s): i for i, s in enumerate(stocks)}
+    labels = [label for label, _, _ in portfolios]
+    holdings = []
+    for _, selection, units in portfolios:
+        held: Dict[int, float] = {}
+        for i, s in enumerate(selection):
+            row = row_of[id(s)]
+            held[row] = held.get(row, 0.0) + s["cost_eur"] * (units[i] if units else 1)
+        holdings.append(held)
+    percent_of = {i: s["percent"] for i, s in enumerate(stocks)}
+    reference = None
+    sienna = SIENNA_REFERENCES.get(csv_path.name)
+    if sienna is not None:
+        rows_of: Dict[str, List[int]] = {}
+        for i, s in enumerate(stocks):
+            rows_of.setdefault(s["name"], []).append(i)
+        candidates = [rows_of.get(name, []) for name in sienna["actions"]]
+        if all(candidates):
+            # a duplicated name: take the rows whose costs best match the reference total
+            choices = itertools.islice(itertools.product(*candidates), 4096)
+            rows = min(choices, key=lambda rows: abs(sum(stocks[i]["cost_eur"] for i in rows) - sienna["cost"]))
+            total = sum(stocks[i]["cost_eur"] for i in rows)
+            # Sienna's amounts: the reference total, split like the CSV costs
+            held = {}
+            for i in rows:
+                held[i] = held.get(i, 0.0) + stocks[i]["cost_eur"] * sienna["cost"] / total
+            holdings.append(held)
+            labels.append("Sienna")
+            reference = len(holdings) - 1
+    shocks = None
+    if args.stress_shocks:
+        with open(args.stress_shocks, newline="", encoding="utf-8") as f:
+            shocks = []
+            for row in csv.reader(f):
+                try:
+                    shocks.append(parse_float(row[0]))
+                except (ValueError, IndexError):
+                    continue  # header or empty line
+    with profiler.phase("stress"):
+        results = stress_portfolios(holdings, percent_of, args.stress, args.stress_seed, args.stress_vol,
+                                    args.stress_corr, shocks, reference)
+    print()
+    print(format_stress(labels, results, len(shocks) if shocks is not None else args.stress))
+
+def write_metrics(profiler: PhaseProfiler, meta: Dict, target: str, stdout=None) -> None:
+    """Write the profile as JSON to target ("-" for stdout, or the given stdout stream)."""
+    data = dict(meta, **profiler.as_dict())
+    if target == "-":
+        stdout = stdout or sys.stdout
+        json.dump(data, stdout, ensure_ascii=False, indent=2)
+        stdout.write("\n")
+        return
+    with open(target, "w", encoding="utf-8") as out:
+        json.dump(data, out, ensure_ascii=False, indent=2)
+
+def run_stream(args, csv_path: Path, profiler, start: float, metrics_out=None) -> int:
+    """--stream: exact solve without loading the CSV in memory (see streaming.py)."""
+    if np is None:
+        print("--stream requires numpy (pip install numpy).")
+        return 2
+    if (args.mode == "single" or args.sweep is not None or args.top_k is not None or args.reduce
+            or args.approx is not None or args.max_items is not None or args.group_cap is not None
+            or args.group_cap_for or args.max_units is not None or args.stress):
+        print("--stream only supports the plain combo solve.")
+        return 2
+    from streaming import solve_streaming
+
+    budget_cents = int(round(args.budget * 100))
+    result = solve_streaming(csv_path, budget_cents, args.unit, spill_dir=args.spill_dir, profiler=profiler)
+    end = time.perf_counter()
+    stats = result["stats"]
+    with profiler.phase("output"):
+        print("--- Best combination (streaming, LP core) ---")
+        print(f"Items available: {stats['rows']} | Budget: {args.budget:.2f} € ({budget_cents} cents)")
+        print(f"Fixed in: {stats['fixed_in']} | Fixed out: {stats['fixed_out']} | Core solved by DP: {stats['core']}")
+        print(f"Selected items: {len(result['selection'])}")
+        print(f"Total cost: {format_eur_cents(result['cost_cents'])}")
+        print(f"Total profit: {format_eur_cents(result['profit_cents'])}")
+        print(f"Final value (cost + profit): {format_eur_cents(result['cost_cents'] + result['profit_cents'])}")
+        print(f"LP upper bound: {format_eur_cents(result['upper_bound'])}")
+        print(f"Time: {(end-start):.4f} s")
+        if args.trace_memory:
+            peak = peak_memory_bytes()
+            if peak is not None:
+                print(f"Peak memory: {peak / (1024 * 1024):.1f} MiB")
+        print("\nSelection details:")
+        for s in result["selection"]:
+            print(f"- {s['name']} | Cost: {s['cost_eur']:.2f} € | Profit: {s['profit_eur']:.2f} € | {s['percent']:.2f} %")
+    if args.profile is not None:
+        print("\n--- Profile ---")
+        print(profiler.report())
+    if args.metrics_json is not None:
+        meta = {
+            "input": str(csv_path),
+            "items": stats["rows"],
+            "budget_cents": budget_cents,
+            "mode": "stream",
+            "engine": "numpy",
+            "core": stats["core"],
+            "tracemalloc": profiler.trace_memory,
+            "peak_rss_bytes": peak_memory_bytes() if resource is not None else None,
+        }
+        write_metrics(profiler, meta, args.metrics_json, metrics_out)
+    return 0
+
 def main(argv=None):
     parser = argparse.ArgumentParser(description="Optimized portfolio selector (0/1 knapsack DP)")
     parser.add_argument("--input", "-i", type=str, default="Liste+d'actions+-+P7+Python+-+Feuille+1.csv", help="CSV input file path")
     parser.add_argument("--budget", "-b", type=float, default=DEFAULT_BUDGET_EUR, help="Budget in euros")
+    parser.add_argument("--unit", choices=UNITS, default="auto", help="Profit column unit (auto: percent unless its header says euros)")
     parser.add_argument("--mode", "-m", choices=["combo", "single"], default="combo", help="combo = best subset, single = best single action")
+    parser.add_argument("--engine", "-e", choices=sorted(ENGINES), default="python", help="DP engine used in combo mode (numpy = vectorized, needs numpy)")
+    parser.add_argument("--reconstruct", "-r", choices=["updates", "bitset", "hirschberg"], default=None, help="How the selection is rebuilt: updates (python default), bitset (numpy default) or hirschberg (O(budget) memory)")
+    parser.add_argument("--node-limit", type=int, default=None, help="bnb engine: stop after this many nodes and report the optimality gap")
+    parser.add_argument("--time-limit", type=float, default=None, help="bnb engine: stop after this many seconds and report the optimality gap")
+    parser.add_argument("--approx", type=float, default=None, metavar="EPSILON", help="Approximate solve (FPTAS) within (1 - EPSILON) of the optimum, in time independent of the budget; reports a proven upper bound")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="parallel engine: worker processes (default: CPU count)")
+    parser.add_argument("--max-items", type=int, default=None, help="Select at most this many stocks (exact, solved inside the DP; needs numpy)")
+    parser.add_argument("--group-cap", type=int, default=None, help="Select at most this many stocks per group (see --group-prefix)")
+    parser.add_argument("--group-cap-for", action="append", default=[], metavar="GROUP=K", help="Cap for one group, overriding --group-cap (repeatable)")
+    parser.add_argument("--group-prefix", type=int, default=7, help="Group = first N characters of the stock name (default 7: 'Share-X')")
+    parser.add_argument("--max-units", type=str, default=None, metavar="N|COLUMN", help="Allow up to N units of each stock, or the count in CSV column COLUMN (bounded knapsack)")
+    parser.add_argument("--top-k", type=int, default=None, metavar="K", help="List the K best distinct combinations (DP table + best-first enumeration; memory grows with items x budget)")
+    parser.add_argument("--reduce", action="store_true", help="Shrink the instance (dominance, LP fixing, GCD...) before solving")
+    parser.add_argument("--sweep", type=float, default=None, metavar="STEP", help="Output the profit-vs-budget frontier every STEP euros up to --budget, from a single DP solve")
+    parser.add_argument("--sweep-out", type=str, default=None, help="Frontier output file (.json or .csv); stdout CSV by default")
+    parser.add_argument("--stream", action="store_true", help="Out-of-core exact solve for huge CSVs: chunked read, spill file, LP core + reduced-cost fixing (needs numpy)")
+    parser.add_argument("--spill-dir", type=str, default=None, help="--stream: directory of the temporary spill files (default: system temp dir)")
+    parser.add_argument("--no-cache", action="store_true", help="Parse the CSV directly, bypassing the .stock_cache dataset cache")
+    parser.add_argument("--trace-memory", action="store_true", help="Report peak memory of the run (max RSS, tracemalloc on Windows)")
+    parser.add_argument("--stress", type=int, default=None, metavar="N", help="Stress-test the result (and the --top-k alternatives) on N random return scenarios (needs numpy)")
+    parser.add_argument("--stress-vol", type=float, default=0.5, help="Scenario volatility, relative to each stock's CSV return")
+    parser.add_argument("--stress-corr", type=float, default=0.3, help="Share of the volatility driven by a common market factor (0..1)")
+    parser.add_argument("--stress-seed", type=int, default=None, help="Random seed of the scenarios")
+    parser.add_argument("--stress-shocks", type=str, default=None, metavar="CSV", help="Historical market shocks in %% (first column), one scenario per row, instead of the random market factor")
+    parser.add_argument("--profile", nargs="?", const="time", choices=["time", "memory"], default=None,
+                        help="Report per-phase timings and DP cells/s; 'memory' adds the tracemalloc peak of each phase (much slower python engine)")
+    parser.add_argument("--metrics-json", type=str, default=None, metavar="PATH", help="Write the per-phase profile as JSON to PATH ('-' for stdout, the human report then goes to stderr); implies --profile")
     args = parser.parse_args(argv)
+    if args.metrics_json != "-":
+        return run(args)
+    # stdout carries only the JSON metrics; the human report goes to stderr
+    stdout = sys.stdout
+    with redirect_stdout(sys.stderr):
+        return run(args, metrics_out=stdout)
+
+def run(args, metrics_out=None) -> int:
+    """Body of main() once the arguments are parsed; metrics_out receives --metrics-json -."""
 
     csv_path = Path(args.input)
     if not csv_path.exists():
         print(f"File not found: {csv_path}")
         return 2
-    start = time.time()
-    stocks = load_stocks(csv_path)
+    if args.stress is not None and (np is None or args.stress < 1):
+        print("--stress needs numpy and a positive number of scenarios.")
+        return 2
+    profiling = args.profile is not None or args.metrics_json is not None
+    profiler = PhaseProfiler(trace_memory=args.profile == "memory") if profiling else NO_PROFILER
+    if (args.trace_memory and resource is None) or args.profile == "memory":
+        tracemalloc.start()
+    start = time.perf_counter()
+    if args.stream:
+        return run_stream(args, csv_path, profiler, start, metrics_out)
+    stocks = load_stocks(csv_path, args.unit, use_cache=not args.no_cache, profiler=profiler)
     if not stocks:
         print("No valid stocks after parsing.")
         return 1
     budget_cents = int(round(args.budget * 100))
 
-    if args.mode == "single":
-        best = best_single(stocks, budget_cents)
-        if best is None:
-            print("No single action fits the budget.")
-        else:
-            print("--- Best single action ---")
-            print(f"Name: {best['name']}")
-            print(f"Cost: {best['cost_eur']:.2f} € | Profit: {best['profit_eur']:.2f} € ({best['percent']:.2f} %)")
+    if args.sweep is not None:
+        if (args.reduce or args.approx is not None or args.top_k is not None or args.mode == "single" or args.max_units is not None
+                or args.max_items is not None or args.group_cap is not None or args.group_cap_for or args.stress):
+            print("--sweep cannot be combined with --reduce, --approx, --top-k, --max-items, group caps, --max-units, --stress or --mode single.")
+            return 2
+        step_cents = int(round(args.sweep * 100))
+        if step_cents <= 0:
+            print("--sweep step must be positive.")
+            return 2
+        try:
+            dp, select = budget_sweep(stocks, budget_cents, args.engine, profiler)
+        except (ValueError, RuntimeError) as e:
+            print(e)
+            return 2
+        with profiler.phase("reconstruct"):
+            points = frontier_points(dp, select, budget_cents, step_cents)
+        with profiler.phase("output"):
+            if args.sweep_out:
+                with open(args.sweep_out, "w", newline="", encoding="utf-8") as out:
+                    write_frontier(points, out)
+                print(f"Frontier: {len(points)} budget points written to {args.sweep_out} ({time.perf_counter() - start:.4f} s)")
+            else:
+                write_frontier(points, sys.stdout)
+    elif args.top_k is not None:
+        if args.reduce or args.approx is not None or args.mode == "single":
+            print("--top-k cannot be combined with --reduce, --approx or --mode single.")
+            return 2
+        try:
+            ranked = knapsack_top_k(stocks, budget_cents, args.top_k, "numpy" if args.engine == "numpy" else "python", profiler)
+        except (ValueError, RuntimeError) as e:
+            print(e)
+            return 2
+        end = time.perf_counter()
+        with profiler.phase("output"):
+            print(f"--- Top {args.top_k} combinations (DP table, {'numpy' if args.engine == 'numpy' else 'python'}) ---")
+            print(f"Items available: {len(stocks)} | Budget: {args.budget:.2f} € ({budget_cents} cents)")
+            print(f"Time: {(end-start):.4f} s")
+            for rank, (selection, cost_cents, profit_cents) in enumerate(ranked, 1):
+                print(f"\n#{rank} | Profit: {format_eur_cents(profit_cents)} | Cost: {format_eur_cents(cost_cents)} | Items: {len(selection)}")
+                print("  " + ", ".join(s["name"] for s in selection))
+        if args.stress:
+            run_stress(args, csv_path, stocks, [(f"#{rank}", sel, None) for rank, (sel, _, _) in enumerate(ranked, 1)], profiler)
+    elif args.mode == "single":
+        with profiler.phase("best_scan"):
+            best = best_single(stocks, budget_cents)
+        with profiler.phase("output"):
+            if best is None:
+                print("No single action fits the budget.")
+            else:
+                print("--- Best single action ---")
+                print(f"Name: {best['name']}")
+                print(f"Cost: {best['cost_eur']:.2f} € | Profit: {best['profit_eur']:.2f} € ({best['percent']:.2f} %)")
+            print(f"Time: {time.perf_counter() - start:.4f} s")
     else:
-        selection, cost_cents, profit_cents, dp_best = knapsack_dp(stocks, budget_cents)
-        end = time.time()
-        print("--- Best combination (DP) ---")
-        print(f"Items available: {len(stocks)} | Budget: {args.budget:.2f} € ({budget_cents} cents)")
-        print(f"Selected items: {len(selection)}")
-        print(f"Total cost: {format_eur_cents(cost_cents)}")
-        print(f"Total profit: {format_eur_cents(profit_cents)}")
-        print(f"Final value (cost + profit): {format_eur_cents(cost_cents + profit_cents)}")
-        print(f"Time: {(end-start):.4f} s")
-        print("\nSelection details:")
-        for s in selection:
-            print(f"- {s['name']} | Cost: {s['cost_eur']:.2f} € | Profit: {s['profit_eur']:.2f} € | {s['percent']:.2f} %")
+        if args.engine == "numpy" and np is None:
+            print("The numpy engine requires numpy (pip install numpy).")
+            return 2
+        engine = ENGINES[args.engine]
+        if args.engine == "parallel":
+            engine = lambda work, work_budget, profiler: knapsack_parallel(work, work_budget, args.workers, profiler)
+        work, work_budget = stocks, budget_cents
+        if args.reduce:
+            with profiler.phase("clean"):
+                work, work_budget, expand, reduction_stats = reduce_stocks(stocks, budget_cents)
+        upper_bound = None
+        units = None
+        constrained = args.max_items is not None or args.group_cap is not None or args.group_cap_for
+        if constrained:
+            if args.reduce or args.approx is not None or args.max_units is not None:
+                print("--max-items and group caps cannot be combined with --reduce, --approx or --max-units.")
+                return 2
+            group_caps = None
+            if args.group_cap is not None or args.group_cap_for:
+                try:
+                    overrides = {g: int(k) for g, k in (item.rsplit("=", 1) for item in args.group_cap_for)}
+                except ValueError:
+                    print("--group-cap-for expects GROUP=K.")
+                    return 2
+                group_caps = {s["name"][:args.group_prefix]: args.group_cap for s in stocks} if args.group_cap is not None else {}
+                group_caps.update(overrides)
+            try:
+                selection, cost_cents, profit_cents, dp_best = knapsack_constrained(
+                    work, work_budget, args.max_items, lambda s: s["name"][:args.group_prefix], group_caps, profiler)
+            except (ValueError, RuntimeError) as e:
+                print(e)
+                return 2
+        elif args.max_units is not None:
+            if args.reduce or args.approx is not None or args.engine in ("bnb", "parallel"):
+                print("--max-units cannot be combined with --reduce, --approx or the bnb/parallel engines.")
+                return 2
+            try:
+                max_units = int(args.max_units) if args.max_units.isdigit() else load_max_units(csv_path, args.max_units, work)
+                selection, cost_cents, profit_cents, dp_best, units = knapsack_bounded(
+                    work, work_budget, max_units, engine, profiler)
+            except KeyError as e:
+                print(e.args[0])
+                return 2
+            except (ValueError, RuntimeError) as e:
+                print(e)
+                return 2
+        elif args.approx is not None:
+            try:
+                selection, cost_cents, profit_cents, upper_bound = knapsack_fptas(work, work_budget, args.approx, profiler)
+            except ValueError as e:
+                print(e)
+                return 2
+        elif args.engine == "bnb":
+            with profiler.phase("search"):
+                selection, cost_cents, profit_cents, upper_bound, nodes = branch_and_bound(
+                    work, work_budget, node_limit=args.node_limit, time_limit=args.time_limit)
+        elif args.reconstruct is not None:
+            if args.engine not in ("python", "numpy"):
+                print(f"--reconstruct does not apply to the {args.engine} engine.")
+                return 2
+            try:
+                selection, cost_cents, profit_cents, dp_best = engine(work, work_budget, reconstruct=args.reconstruct, profiler=profiler)
+            except ValueError as e:
+                print(e)
+                return 2
+        else:
+            selection, cost_cents, profit_cents, dp_best = engine(work, work_budget, profiler=profiler)
+        if args.reduce:
+            with profiler.phase("reconstruct"):
+                selection = expand(selection)
+                fixed_profit = sum(s["profit_cents"] for s in selection) - profit_cents
+                cost_cents = sum(s["cost_cents"] for s in selection)
+                profit_cents += fixed_profit
+                if upper_bound is not None:
+                    upper_bound += fixed_profit
+        end = time.perf_counter()
+        with profiler.phase("output"):
+            if constrained:
+                caps = []
+                if args.max_items is not None:
+                    caps.append(f"max {args.max_items} items")
+                if args.group_cap is not None:
+                    caps.append(f"max {args.group_cap} per group of {args.group_prefix} chars")
+                if args.group_cap_for:
+                    caps.append(", ".join(args.group_cap_for))
+                print(f"--- Best combination (DP, {'; '.join(caps)}) ---")
+            elif args.approx is not None:
+                print(f"--- Approximate combination (FPTAS, epsilon={args.approx:g}) ---")
+            elif args.engine == "bnb":
+                print("--- Best combination (branch and bound) ---")
+            else:
+                print(f"--- Best combination (DP, {args.engine} engine{', bounded units' if units is not None else ''}) ---")
+            print(f"Items available: {len(stocks)} | Budget: {args.budget:.2f} € ({budget_cents} cents)")
+            if not args.no_cache:
+                print(f"Dataset cache: {format_cache_stats()}")
+            if args.reduce:
+                print(format_stats(reduction_stats))
+            print(f"Selected items: {len(selection)}" + (f" ({sum(units)} units)" if units is not None else ""))
+            print(f"Total cost: {format_eur_cents(cost_cents)}")
+            print(f"Total profit: {format_eur_cents(profit_cents)}")
+            print(f"Final value (cost + profit): {format_eur_cents(cost_cents + profit_cents)}")
+            if upper_bound is not None:
+                gap = (upper_bound - profit_cents) / upper_bound if upper_bound else 0.0
+                if args.approx is not None:
+                    status = "proven optimal" if upper_bound == profit_cents else f"guaranteed >= {1 - args.approx:.2%} of optimum"
+                    print(f"Upper bound: {format_eur_cents(upper_bound)} | Gap: {gap:.4%} ({status})")
+                else:
+                    status = "optimal" if upper_bound == profit_cents else "limit reached"
+                    print(f"Nodes: {nodes} | Upper bound: {format_eur_cents(upper_bound)} | Gap: {gap:.4%} ({status})")
+            print(f"Time: {(end-start):.4f} s")
+            if args.trace_memory:
+                peak = peak_memory_bytes()
+                if peak is not None:
+                    print(f"Peak memory: {peak / (1024 * 1024):.1f} MiB")
+            print("\nSelection details:")
+            for i, s in enumerate(selection):
+                if units is not None:
+                    u = units[i]
+                    print(f"- {s['name']} x{u} | Cost: {s['cost_eur'] * u:.2f} € | Profit: {s['profit_eur'] * u:.2f} € | {s['percent']:.2f} %")
+                else:
+                    print(f"- {s['name']} | Cost: {s['cost_eur']:.2f} € | Profit: {s['profit_eur']:.2f} € | {s['percent']:.2f} %")
+        if args.stress:
+            run_stress(args, csv_path, stocks, [("DP", selection, units)], profiler)
+
+    if profiling:
+        if args.profile is not None:
+            print("\n--- Profile ---")
+            print(profiler.report())
+        if args.metrics_json is not None:
+            meta = {
+                "input": str(csv_path),
+                "items": len(stocks),
+                "budget_cents": budget_cents,
+                "mode": "sweep" if args.sweep is not None else "top-k" if args.top_k is not None else args.mode,
+                "engine": "fptas" if args.approx is not None else args.engine,
+                "epsilon": args.approx,
+                "reconstruct": args.reconstruct,
+                "reduce": args.reduce,
+                "tracemalloc": profiler.trace_memory,
+                "peak_rss_bytes": peak_memory_bytes() if resource is not None else None,
+            }
+            write_metrics(profiler, meta, args.metrics_json, metrics_out)
+    return 0
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
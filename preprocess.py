@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Réduction d'instance avant résolution
+-------------------------------------
+Partagé par optimized.py, bruteforce.py et comparison_results.py : réduit le
+nombre d'actions (et la taille de la grille en centimes) sans changer l'optimum.
+
+Étapes, dans l'ordre :
+- suppression des actions plus chères que le budget ;
+- dominance : une action est retirée si au moins K autres coûtent moins (ou
+  autant) et rapportent plus (ou autant), K étant le nombre maximal d'actions
+  qu'une solution peut contenir — un échange donne toujours une solution au
+  moins aussi bonne. Les lignes identiques restent des actions distinctes
+  (chacune peut être achetée) et ne sont retirées que par cette règle ;
+- fixation par bornes de la relaxation linéaire (coûts réduits, Dembo–Hammer) :
+  une action est forcée (ou exclue) si l'exclure (ou la prendre) ne peut pas
+  battre la solution gloutonne ;
+- division des coûts et du budget par le PGCD des coûts.
+
+Coûts, profits et budget sont des entiers (centimes).
+"""
+
+from fractions import Fraction
+from functools import reduce
+from math import gcd
+from typing import Dict, List
+
+def _max_cardinality(costs: List[int], budget: int) -> int:
+    """Nombre maximal d'actions qui tiennent ensemble dans le budget."""
+    total = count = 0
+    for c in sorted(costs):
+        total += c
+        if total > budget:
+            break
+        count += 1
+    return count
+
+def _dominated(indices: List[int], costs: List[int], profits: List[int], budget: int) -> List[int]:
+    """Actions dominées par au moins K autres (K = cardinalité maximale)."""
+    k = _max_cardinality([costs[i] for i in indices], budget)
+    if k == 0:
+        return list(indices)
+    # ordre total : coût croissant, profit décroissant, indice croissant ;
+    # j domine i si j précède i et p_j >= p_i
+    order = sorted(indices, key=lambda i: (costs[i], -profits[i], i))
+    ranks = {p: r for r, p in enumerate(sorted({profits[i] for i in indices}, reverse=True), 1)}
+    tree = [0] * (len(ranks) + 1)  # Fenwick : nombre d'actions vues par rang de profit
+    dominated = []
+    for i in order:
+        r = ranks[profits[i]]
+        seen, j = 0, r
+        while j > 0:
+            seen += tree[j]
+            j -= j & -j
+        if seen >= k:
+            dominated.append(i)
+        j = r
+        while j < len(tree):
+            tree[j] += 1
+            j += j & -j
+    return dominated
+
+def _lp_fixing(indices: List[int], costs: List[int], profits: List[int], budget: int):
+    """Fixe des actions à 1 ou 0 grâce aux bornes de coûts réduits.
+
+    Renvoie (forcées, exclues). r est le ratio de l'action critique de la
+    relaxation linéaire, U sa valeur et L la valeur de la solution gloutonne :
+    exclure une action prise par la relaxation coûte au moins p_j - r*c_j, prendre
+    une action laissée de côté coûte au moins r*c_j - p_j.
+    """
+    free = [i for i in indices if costs[i] == 0]
+    order = sorted((i for i in indices if costs[i] > 0), key=lambda i: Fraction(profits[i], costs[i]), reverse=True)
+    used = 0
+    brk = len(order)
+    for pos, i in enumerate(order):
+        if used + costs[i] > budget:
+            brk = pos
+            break
+        used += costs[i]
+    if brk == len(order):
+        return free + order, []
+
+    b = order[brk]
+    ratio = Fraction(profits[b], costs[b])
+    upper = sum(profits[i] for i in order[:brk]) + (budget - used) * ratio
+    lower, room = 0, budget
+    for i in order:
+        if costs[i] <= room:
+            room -= costs[i]
+            lower += profits[i]
+
+    fixed_in, fixed_out = list(free), []
+    for i in order[:brk]:
+        if upper - (profits[i] - ratio * costs[i]) < lower:
+            fixed_in.append(i)
+    for i in order[brk + 1:]:
+        if upper - (ratio * costs[i] - profits[i]) < lower:
+            fixed_out.append(i)
+    return fixed_in, fixed_out
+
+def reduce_instance(names: List[str], costs: List[int], profits: List[int], budget: int) -> Dict:
+    """Réduit une instance de sac à dos 0/1 (coûts, profits et budget en centimes).
+
+    Renvoie un dict :
+    - "kept" : indices des actions à passer au solveur ;
+    - "fixed_in" : indices des actions forcément achetées ;
+    - "scale" : PGCD par lequel les coûts des actions gardées doivent être divisés ;
+    - "budget" : budget restant pour les actions gardées, déjà divisé par "scale" ;
+    - "stats" : nombre d'actions retirées par règle et cellules de grille éliminées.
+    """
+    n = len(costs)
+    stats = {"items_in": n}
+    indices = [i for i in range(n) if costs[i] <= budget]
+    stats["over_budget"] = n - len(indices)
+
+    dominated = set(_dominated(indices, costs, profits, budget))
+    stats["dominated"] = len(dominated)
+    indices = [i for i in indices if i not in dominated]
+
+    fixed_in, fixed_out = _lp_fixing(indices, costs, profits, budget)
+    stats["fixed_in"] = len(fixed_in)
+    stats["fixed_out"] = len(fixed_out)
+    fixed = set(fixed_in) | set(fixed_out)
+    kept = [i for i in indices if i not in fixed]
+    remaining = budget - sum(costs[i] for i in fixed_in)
+
+    scale = reduce(gcd, (costs[i] for i in kept), 0) or 1
+    stats["gcd"] = scale
+    stats["items_out"] = len(kept)
+    stats["cells_before"] = n * (budget + 1)
+    stats["cells_after"] = len(kept) * (remaining // scale + 1)
+    return {
+        "kept": kept,
+        "fixed_in": sorted(fixed_in),
+        "scale": scale,
+        "budget": remaining // scale,
+        "stats": stats,
+    }
+
+def format_stats(stats: Dict) -> str:
+    """Résumé d'une ligne des éliminations."""
+    eliminated = stats["cells_before"] - stats["cells_after"]
+    share = eliminated / stats["cells_before"] if stats["cells_before"] else 0.0
+    return (
+        f"Réduction : {stats['items_in']} -> {stats['items_out']} actions "
+        f"(hors budget {stats['over_budget']}, "
+        f"dominées {stats['dominated']}, forcées {stats['fixed_in']}, exclues {stats['fixed_out']}, "
+        f"PGCD {stats['gcd']}) | cellules DP éliminées : {eliminated:_} ({share:.1%})".replace("_", " ")
+    )
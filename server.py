@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Service de requêtes de portefeuille
+-----------------------------------
+Processus long (asyncio) qui garde en mémoire les datasets déjà chargés
+(optimized.load_stocks) et leur frontière DP (optimized.sweep_tables : meilleur
+profit pour chaque budget jusqu'à la capacité résolue + décisions) : une requête
+« à chaud » n'est qu'une lecture dp[w] suivie du parcours arrière, sans
+re-parser ni re-résoudre.
+
+Les chargements et résolutions « à froid » partent dans un pool de processus,
+la boucle d'événements n'est donc jamais bloquée ; des requêtes simultanées
+sur un même dataset attendent la même résolution.
+
+Transport : lignes JSON sur stdin/stdout (défaut), socket TCP local (--port)
+ou socket Unix (--unix). Une requête par ligne, une réponse par ligne (l'"id"
+de la requête est renvoyé, les réponses peuvent arriver dans le désordre) :
+
+    {"id": 1, "dataset": "dataset1_Python+P7.csv", "budget": 500}
+    {"id": 2, "dataset": "dataset1_Python+P7.csv", "budget": 120, "mode": "single", "top_k": 3}
+    {"id": 3, "op": "load", "dataset": "dataset2_Python+P7.csv"}
+    {"id": 4, "op": "stats"}
+
+mode : "combo" (défaut) ou "single" ; top_k : nombre de portefeuilles renvoyés
+(en combo, top_k > 1 passe par optimized.knapsack_top_k dans le pool, la
+frontière ne gardant que le meilleur). Les classements sont gardés par dataset
+et par budget (un top 10 répond aussi à un top 3), des requêtes simultanées
+attendent le même calcul et un seul classement est calculé à la fois : la table
+complète (actions x budget) n'existe qu'une fois. Un dataset est rechargé si
+son fichier change.
+
+Avec --solver incremental, les requêtes combo (top_k = 1) passent par
+solution_cache.SolutionCache au lieu de la frontière : quand quelques prix du
+fichier bougent, le rechargement est suivi d'une re-résolution qui ne rejoue
+que les lignes entre la zone modifiée et celle de la fois précédente (la base
+DP du dataset survit au rechargement et avance à chaque re-résolution). Le cache vit
+dans le processus du service, ses résolutions sont faites une à une dans un
+thread dédié. La réponse indique "solve" : hit, incremental ou cold.
+
+Usage:
+    python server.py [--port 8765 | --unix /tmp/portefeuille.sock] [--workers 2]
+                     [--engine numpy|python] [--capacity 500] [--solver frontier|incremental]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import optimized
+from solution_cache import SolutionCache
+from stock_loader import UNITS
+
+DEFAULT_ENGINE = "numpy" if optimized.np is not None else "python"
+MAX_RANKINGS = 32  # classements top-k gardés par dataset
+
+class _Dataset:
+    """Dataset chargé et, une fois résolue, sa frontière DP."""
+
+    def __init__(self, path: Path, signature, stocks: List[Dict]):
+        self.path = path
+        self.signature = signature
+        self.stocks = stocks
+        self.by_profit = sorted(stocks, key=lambda s: (-s["profit_cents"], s["cost_cents"]))
+        self.capacity = -1
+        self.dp = None
+        self.select = None
+        self.solving = None  # (capacité, tâche) de la résolution en cours
+        self.rankings: "OrderedDict[int, list]" = OrderedDict()  # budget -> classement top-k
+        self.ranking: Dict[int, tuple] = {}  # budget -> (k, tâche) du classement en cours
+
+class _Ranking(list):
+    """Classement top-k (liste de (sélection, coût, profit)) ; complete si plus court que le k demandé."""
+    complete = False
+
+def _signature(path: Path):
+    st = path.stat()
+    return st.st_mtime_ns, st.st_size
+
+def _portfolio(selection: List[Dict], cost_cents: int, profit_cents: int) -> Dict:
+    return {
+        "cost_eur": cost_cents / 100,
+        "profit_eur": profit_cents / 100,
+        "items": len(selection),
+        "names": [s["name"] for s in selection],
+    }
+
+class PortfolioServer:
+    def __init__(self, workers: int = 2, engine: str = DEFAULT_ENGINE, capacity_cents: int = 50000,
+                 unit: str = "auto", use_cache: bool = True, solver: str = "frontier"):
+        # spawn partout (comme sous Windows) : un fork pendant que le thread de lecture
+        # de stdin tient un verrou peut figer le processus fils
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+        self.engine = engine
+        self.capacity_cents = capacity_cents
+        self.unit = unit
+        self.use_cache = use_cache
+        self.datasets: Dict[Path, _Dataset] = {}
+        self.loading: Dict[Path, asyncio.Task] = {}
+        self.ranking_slot = asyncio.Semaphore(1)  # une seule table top-k à la fois
+        self.solver = solver
+        self.solutions = SolutionCache() if solver == "incremental" else None
+        self.solution_thread = ThreadPoolExecutor(max_workers=1) if solver == "incremental" else None
+        self.stats = {"queries": 0, "warm": 0, "cold_solves": 0, "loads": 0, "errors": 0}
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+        if self.solution_thread is not None:
+            self.solution_thread.shutdown(cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+
+    async def dataset(self, name: str) -> _Dataset:
+        """Dataset chargé, rechargé si le fichier a changé depuis."""
+        path = Path(name).resolve()
+        signature = _signature(path)
+        ds = self.datasets.get(path)
+        if ds is not None and ds.signature == signature:
+            return ds
+        task = self.loading.get(path)
+        if task is None:
+            task = asyncio.ensure_future(self._load(path, signature))
+            self.loading[path] = task
+            task.add_done_callback(lambda _: self.loading.pop(path, None))
+        return await asyncio.shield(task)
+
+    async def _load(self, path: Path, signature) -> _Dataset:
+        stocks = await self._run(optimized.load_stocks, path, self.unit, self.use_cache)
+        if not stocks:
+            raise ValueError(f"aucune action valide dans {path}")
+        self.stats["loads"] += 1
+        ds = _Dataset(path, signature, stocks)
+        self.datasets[path] = ds
+        return ds
+
+    async def frontier(self, ds: _Dataset, budget_cents: int) -> bool:
+        """S'assure que la frontière couvre budget_cents ; True si elle était déjà prête."""
+        if budget_cents <= ds.capacity:
+            return True
+        while ds.solving is not None and ds.solving[0] < budget_cents:
+            await asyncio.shield(ds.solving[1])  # résolution trop petite en cours : on l'attend puis on voit
+            if budget_cents <= ds.capacity:
+                return False
+        if ds.solving is None:
+            capacity = max(budget_cents, self.capacity_cents)
+            task = asyncio.ensure_future(self._solve(ds, capacity))
+            ds.solving = (capacity, task)
+        await asyncio.shield(ds.solving[1])
+        return False
+
+    async def _solve(self, ds: _Dataset, capacity: int) -> None:
+        try:
+            dp, decisions = await self._run(optimized.sweep_tables, ds.stocks, capacity, self.engine)
+            self.stats["cold_solves"] += 1
+            if capacity > ds.capacity:
+                ds.dp = dp
+                ds.select = optimized.sweep_selector(ds.stocks, dp, decisions, capacity, self.engine)
+                ds.capacity = capacity
+        finally:
+            ds.solving = None
+
+    async def top_k(self, ds: _Dataset, budget_cents: int, k: int):
+        """(k meilleurs portefeuilles, True si déjà calculés) ; un classement plus long sert aussi."""
+        ranked = ds.rankings.get(budget_cents)
+        if ranked is not None and (len(ranked) >= k or ranked.complete):
+            ds.rankings.move_to_end(budget_cents)
+            return ranked[:k], True
+        while budget_cents in ds.ranking:
+            running_k, task = ds.ranking[budget_cents]
+            await asyncio.shield(task)
+            ranked = ds.rankings.get(budget_cents)
+            if ranked is not None and (running_k >= k or ranked.complete):
+                return ranked[:k], False
+        task = asyncio.ensure_future(self._rank(ds, budget_cents, k))
+        ds.ranking[budget_cents] = (k, task)
+        return (await asyncio.shield(task))[:k], False
+
+    async def _rank(self, ds: _Dataset, budget_cents: int, k: int) -> list:
+        try:
+            async with self.ranking_slot:
+                ranked = _Ranking(await self._run(optimized.knapsack_top_k, ds.stocks, budget_cents, k, self.engine))
+            self.stats["cold_solves"] += 1
+            ranked.complete = len(ranked) < k  # moins de k sélections distinctes : rien de plus à trouver
+            ds.rankings[budget_cents] = ranked
+            ds.rankings.move_to_end(budget_cents)
+            if len(ds.rankings) > MAX_RANKINGS:
+                ds.rankings.popitem(last=False)
+            return ranked
+        finally:
+            ds.ranking.pop(budget_cents, None)
+
+    def _incremental_solve(self, ds: _Dataset, budget_cents: int):
+        """SolutionCache.solve (thread dédié) ; renvoie aussi le chemin pris : hit, incremental ou cold."""
+        before = dict(self.solutions.stats)
+        selection, cost_cents, profit_cents, _ = self.solutions.solve(ds.stocks, budget_cents, dataset=str(ds.path))
+        how = next(key for key in ("hits", "incremental", "cold") if self.solutions.stats[key] > before[key])
+        return selection, cost_cents, profit_cents, {"hits": "hit"}.get(how, how)
+
+    async def query(self, request: Dict) -> Dict:
+        op = request.get("op", "query")
+        if op == "stats":
+            response = {"stats": dict(self.stats), "datasets": {
+                str(p): {"items": len(ds.stocks), "capacity_eur": max(ds.capacity, 0) / 100}
+                for p, ds in self.datasets.items()}}
+            if self.solutions is not None:
+                response["solution_cache"] = dict(self.solutions.stats)
+            return response
+        if "dataset" not in request:
+            raise ValueError("champ 'dataset' manquant")
+        ds = await self.dataset(request["dataset"])
+        if op == "load":
+            if self.solutions is None:
+                await self.frontier(ds, self.capacity_cents)
+            return {"dataset": request["dataset"], "items": len(ds.stocks), "capacity_eur": max(ds.capacity, 0) / 100}
+        if op != "query":
+            raise ValueError(f"opération inconnue: {op}")
+
+        self.stats["queries"] += 1
+        budget_cents = int(round(float(request.get("budget", optimized.DEFAULT_BUDGET_EUR)) * 100))
+        if budget_cents < 0:
+            raise ValueError("le budget doit être positif")
+        mode = request.get("mode", "combo")
+        top_k = int(request.get("top_k", 1))
+        if top_k < 1:
+            raise ValueError("top_k doit être >= 1")
+
+        if mode == "single":
+            picks = [s for s in ds.by_profit if s["cost_cents"] <= budget_cents][:top_k]
+            self.stats["warm"] += 1
+            return {"dataset": request["dataset"], "budget_eur": budget_cents / 100, "mode": mode, "warm": True,
+                    "portfolios": [_portfolio([s], s["cost_cents"], s["profit_cents"]) for s in picks]}
+        if mode != "combo":
+            raise ValueError(f"mode inconnu: {mode} (attendu: combo ou single)")
+        if top_k != 1:
+            ranked, warm = await self.top_k(ds, budget_cents, top_k)
+            if warm:
+                self.stats["warm"] += 1
+            return {"dataset": request["dataset"], "budget_eur": budget_cents / 100, "mode": mode, "warm": warm,
+                    "portfolios": [_portfolio(*r) for r in ranked]}
+
+        if self.solutions is not None:
+            selection, cost_cents, profit_cents, how = await asyncio.get_running_loop().run_in_executor(
+                self.solution_thread, self._incremental_solve, ds, budget_cents)
+            warm = how == "hit"
+            self.stats["warm" if warm else "cold_solves"] += 1
+            return {"dataset": request["dataset"], "budget_eur": budget_cents / 100, "mode": mode, "warm": warm,
+                    "solve": how, "portfolios": [_portfolio(selection, cost_cents, profit_cents)]}
+
+        warm = await self.frontier(ds, budget_cents)
+        if warm:
+            self.stats["warm"] += 1
+        selection, cost_cents, profit_cents = ds.select(budget_cents)
+        return {"dataset": request["dataset"], "budget_eur": budget_cents / 100, "mode": mode, "warm": warm,
+                "portfolios": [_portfolio(selection, cost_cents, profit_cents)]}
+
+    async def handle_line(self, line: str) -> str:
+        start = time.perf_counter()
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("une requête doit être un objet JSON")
+            request_id = request.get("id")
+            response = {"id": request_id, "ok": True}
+            response.update(await self.query(request))
+        except Exception as e:  # la réponse porte l'erreur, le service continue
+            self.stats["errors"] += 1
+            response = {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+        response["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return json.dumps(response, ensure_ascii=False)
+
+    async def serve_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Une connexion : chaque ligne reçue est traitée dans sa propre tâche."""
+        tasks = set()
+
+        async def answer(line: str):
+            writer.write((await self.handle_line(line) + "\n").encode("utf-8"))
+            await writer.drain()
+
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                line = raw.decode("utf-8").strip()
+                if line:
+                    task = asyncio.ensure_future(answer(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def serve_stdio(self) -> None:
+        """Lignes JSON sur stdin, réponses sur stdout (lecture dans un thread, portable Windows)."""
+        loop = asyncio.get_running_loop()
+        tasks = set()
+
+        async def answer(line: str):
+            sys.stdout.write(await self.handle_line(line) + "\n")
+            sys.stdout.flush()
+
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                break
+            line = line.strip()
+            if line:
+                task = asyncio.ensure_future(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+async def _main(args) -> int:
+    server = PortfolioServer(args.workers, args.engine, int(round(args.capacity * 100)), args.unit, not args.no_cache,
+                             args.solver)
+    try:
+        for name in args.preload:
+            await server.query({"op": "load", "dataset": name})
+        if args.port is not None:
+            srv = await asyncio.start_server(server.serve_stream, args.host, args.port)
+        elif args.unix is not None:
+            srv = await asyncio.start_unix_server(server.serve_stream, args.unix)
+        else:
+            await server.serve_stdio()
+            return 0
+        print(f"Service prêt sur {args.unix or f'{args.host}:{args.port}'}", file=sys.stderr, flush=True)
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        server.close()
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Service de requêtes de portefeuille (lignes JSON)")
+    transport = parser.add_mutually_exclusive_group()
+    transport.add_argument("--port", type=int, default=None, help="Écoute TCP sur --host:PORT")
+    transport.add_argument("--unix", type=str, default=None, help="Écoute sur un socket Unix")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--workers", "-w", type=int, default=max(1, min(4, os.cpu_count() or 1)), help="Processus du pool de résolution")
+    parser.add_argument("--engine", "-e", choices=["python", "numpy"], default=DEFAULT_ENGINE, help="Moteur DP des frontières")
+    parser.add_argument("--capacity", type=float, default=optimized.DEFAULT_BUDGET_EUR, help="Budget (€) résolu d'avance pour chaque dataset")
+    parser.add_argument("--unit", choices=UNITS, default="auto", help="Unité de la colonne bénéfice")
+    parser.add_argument("--no-cache", action="store_true", help="Ne pas utiliser le cache disque des datasets")
+    parser.add_argument("--solver", choices=["frontier", "incremental"], default="frontier",
+                        help="Requêtes combo : frontière DP (défaut) ou cache de solutions avec re-résolution incrémentale")
+    parser.add_argument("--preload", nargs="*", default=[], help="Datasets à charger et résoudre au démarrage")
+    args = parser.parse_args(argv)
+    if args.engine == "numpy" and optimized.np is None:
+        print("Le moteur numpy nécessite numpy (pip install numpy).", file=sys.stderr)
+        return 2
+    try:
+        return asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
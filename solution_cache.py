@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+"""
+Mémoïsation des solutions et re-résolution incrémentale
+-------------------------------------------------------
+SolutionCache.solve(stocks, budget_cents, dataset=...) renvoie le même
+quadruplet que optimized.knapsack_dp, en évitant de refaire toute la DP :
+
+- même jeu d'actions (empreinte) et même budget : réponse en cache (LRU) ;
+- sinon, si une « base » existe pour ce dataset et ce budget et que la
+  différence est petite (quelques lignes ajoutées, supprimées ou
+  re-tarifées), seule la zone touchée est recalculée :
+    * la base garde, pour ses lignes « stables », les lignes DP préfixe et
+      suffixe tous les `checkpoint_every` articles et 1 bit de décision par
+      article et par centime dans les deux sens ; les lignes « chaudes »
+      (déjà modifiées ou ajoutées depuis la résolution complète) sont à part
+      et rejouées à chaque appel ;
+    * les lignes stables entre la première et la dernière modifiée sont
+      rejouées à partir de la ligne préfixe, suivies des lignes chaudes, puis
+      combinées avec la ligne suffixe en O(budget) ;
+    * le résultat devient la nouvelle base : les lignes modifiées passent
+      chaudes, les couches préfixe restent valides jusqu'à la zone rejouée et
+      les couches suffixe à partir d'elle ;
+- sinon résolution complète, qui devient la nouvelle base (les lignes
+  modifiées depuis l'ancienne base y sont placées en dernier).
+
+Limite réelle : le coût d'un appel est le nombre de lignes rejouées, soit les
+lignes chaudes plus l'étendue qui va de la zone rejouée à l'appel précédent
+jusqu'aux lignes modifiées. Re-tarifer encore les mêmes lignes, ou des lignes
+voisines, reste donc bon marché ; des modifications éparpillées sur tout le
+dataset (ou loin de la précédente) rejouent jusqu'à toutes les lignes, ce qui
+reste environ deux fois moins cher qu'une résolution complète (une seule
+passe au lieu des couches préfixe et suffixe). Quand il faudrait rejouer plus
+de `max_change_ratio` fois le nombre de lignes (lignes chaudes accumulées),
+on repart d'une résolution complète.
+
+Le profit et le coût sont ceux d'une résolution à froid (profit maximal, puis
+plus petit coût parmi les optimums) ; en cas d'égalité parfaite, les actions
+choisies peuvent différer. La partie incrémentale utilise numpy ; sans numpy,
+chaque miss est une résolution complète (optimized.knapsack_dp).
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # seule la re-résolution incrémentale en a besoin
+    np = None
+
+def _keys(stocks: List[Dict]) -> List[Tuple[str, int]]:
+    """Identifiant stable de chaque ligne : (nom, n-ième occurrence du nom)."""
+    seen: Dict[str, int] = {}
+    keys = []
+    for s in stocks:
+        k = seen.get(s["name"], 0)
+        seen[s["name"]] = k + 1
+        keys.append((s["name"], k))
+    return keys
+
+def fingerprint(stocks: List[Dict]) -> str:
+    """Empreinte d'un jeu d'actions (noms, coûts et profits en centimes, dans l'ordre)."""
+    h = hashlib.blake2b(digest_size=16)
+    for s in stocks:
+        h.update(f"{s['name']}\0{s['cost_cents']}\0{s['profit_cents']}\n".encode("utf-8"))
+    return h.hexdigest()
+
+def _step(dp, c: int, p: int):
+    """Ajoute un article à la ligne dp (en place) ; renvoie le masque de prise compacté."""
+    take = np.zeros(dp.shape[0], dtype=bool)
+    if c >= dp.shape[0]:
+        return np.packbits(take)
+    if c == 0:
+        dp += p
+        take[:] = True
+    else:
+        candidate = dp[:-c] + p
+        better = candidate > dp[c:]
+        dp[c:] = np.where(better, candidate, dp[c:])
+        take[c:] = better
+    return np.packbits(take)
+
+def _bit(packed, w: int) -> int:
+    return (packed[w >> 3] >> (7 - (w & 7))) & 1
+
+class _Base:
+    """Couches DP préfixe/suffixe des lignes stables d'une base, et ses lignes chaudes.
+
+    Les couches préfixe (fwd) sont valides pour les positions <= fwd_end, les
+    couches suffixe (bwd) pour les positions >= bwd_start.
+    """
+
+    def __init__(self, stocks: List[Dict], budget_cents: int, checkpoint_every: int):
+        n = len(stocks)
+        # copie : l'appelant peut modifier ses dicts en place entre deux appels
+        self.stocks = [{"name": s["name"], "cost_cents": s["cost_cents"], "profit_cents": s["profit_cents"]} for s in stocks]
+        self.keys = _keys(stocks)
+        self.position = {k: i for i, k in enumerate(self.keys)}
+        self.hot: List[Tuple[str, int]] = []
+        self.every = checkpoint_every
+        width = budget_cents + 1
+
+        dp = np.zeros(width, dtype=np.int64)
+        self.fwd_rows = {0: dp.copy()}
+        self.fwd_bits = []
+        for i, s in enumerate(stocks):
+            self.fwd_bits.append(_step(dp, s["cost_cents"], s["profit_cents"]))
+            if (i + 1) % checkpoint_every == 0:
+                self.fwd_rows[i + 1] = dp.copy()
+        self.fwd_rows[n] = dp
+        self.full_row = dp
+
+        dp = np.zeros(width, dtype=np.int64)
+        self.bwd_rows = {n: dp.copy()}
+        self.bwd_bits = [None] * n
+        for i in range(n - 1, -1, -1):
+            s = stocks[i]
+            self.bwd_bits[i] = _step(dp, s["cost_cents"], s["profit_cents"])
+            if i % checkpoint_every == 0:
+                self.bwd_rows[i] = dp.copy()
+        self.bwd_start = 0
+
+    def unchanged(self, key: Tuple[str, int], stock: Dict) -> bool:
+        """stock (de clé key) est-il une ligne stable de la base, au même coût et profit ?"""
+        pos = self.position.get(key)
+        if pos is None:
+            return False
+        old = self.stocks[pos]
+        return stock["cost_cents"] == old["cost_cents"] and stock["profit_cents"] == old["profit_cents"]
+
+    @property
+    def fwd_end(self) -> int:
+        return len(self.fwd_bits)
+
+    def prefix_row(self, a: int):
+        """Ligne DP des articles [0, a), rejouée depuis le point de contrôle précédent."""
+        start = a
+        while start not in self.fwd_rows:
+            start -= 1
+        dp = self.fwd_rows[start].copy()
+        for i in range(start, a):
+            _step(dp, self.stocks[i]["cost_cents"], self.stocks[i]["profit_cents"])
+        return dp, a - start
+
+    def suffix_row(self, b: int):
+        """Ligne DP des articles [b, n), rejouée depuis le point de contrôle suivant."""
+        stop = b
+        while stop not in self.bwd_rows:
+            stop += 1
+        dp = self.bwd_rows[stop].copy()
+        for i in range(stop - 1, b - 1, -1):
+            _step(dp, self.stocks[i]["cost_cents"], self.stocks[i]["profit_cents"])
+        return dp, stop - b
+
+    def rebase(self, a: int, b: int, kept: List[int], kept_bits: List, kept_rows: Dict, suffix) -> None:
+        """Les lignes stables [a, b) sont remplacées par kept (celles restées inchangées, rejouées).
+
+        kept_bits / kept_rows : décisions et points de contrôle préfixe de cette
+        relecture ; suffix : ligne suffixe de b. Les couches préfixe valent
+        alors jusqu'à a + len(kept), les couches suffixe à partir de là.
+        """
+        split = a + len(kept)
+        shift = split - b
+        self.stocks = self.stocks[:a] + [self.stocks[pos] for pos in kept] + self.stocks[b:]
+        self.keys = self.keys[:a] + [self.keys[pos] for pos in kept] + self.keys[b:]
+        self.position = {k: i for i, k in enumerate(self.keys)}
+        self.fwd_bits = self.fwd_bits[:a] + kept_bits
+        self.fwd_rows = {pos: row for pos, row in self.fwd_rows.items() if pos <= a}
+        self.fwd_rows.update(kept_rows)
+        self.bwd_bits = [None] * split + self.bwd_bits[b:]
+        self.bwd_rows = {pos + shift: row for pos, row in self.bwd_rows.items() if pos >= b}
+        self.bwd_rows[split] = suffix
+        self.bwd_start = split
+
+class SolutionCache:
+    """Cache LRU de solutions avec re-résolution incrémentale (voir le module)."""
+
+    def __init__(self, max_entries: int = 64, max_bases: int = 4, checkpoint_every: int = 32,
+                 max_change_ratio: float = 1.0):
+        self.results: "OrderedDict[Tuple, List[int]]" = OrderedDict()
+        self.bases: "OrderedDict[Tuple, _Base]" = OrderedDict()
+        self.max_entries = max_entries
+        self.max_bases = max_bases
+        self.checkpoint_every = checkpoint_every
+        self.max_change_ratio = max_change_ratio
+        self.stats = {"hits": 0, "incremental": 0, "cold": 0, "recomputed_items": 0}
+
+    def solve(self, stocks: List[Dict], budget_cents: int, dataset=None) -> Tuple[List[Dict], int, int, int]:
+        """(sélection, coût, profit, meilleur profit), comme optimized.knapsack_dp."""
+        key = (fingerprint(stocks), budget_cents)
+        if key in self.results:
+            self.results.move_to_end(key)
+            self.stats["hits"] += 1
+            return self._from_indices(stocks, self.results[key])
+
+        base = self.bases.get((dataset, budget_cents))
+        result = None
+        if base is not None:
+            self.bases.move_to_end((dataset, budget_cents))
+            result = self._incremental(base, stocks, budget_cents)
+        if result is None:
+            result = self._cold(stocks, budget_cents, dataset, base)
+
+        self.results[key] = result
+        if len(self.results) > self.max_entries:
+            self.results.popitem(last=False)
+        return self._from_indices(stocks, result)
+
+    def _from_indices(self, stocks: List[Dict], indices: List[int]):
+        selection = [stocks[i] for i in indices]
+        cost = sum(s["cost_cents"] for s in selection)
+        profit = sum(s["profit_cents"] for s in selection)
+        return selection, cost, profit, profit
+
+    def _cold(self, stocks: List[Dict], budget_cents: int, dataset, previous: _Base = None) -> List[int]:
+        self.stats["cold"] += 1
+        self.stats["recomputed_items"] += len(stocks)
+        if np is None:
+            from optimized import knapsack_dp
+            selection, _, _, _ = knapsack_dp(stocks, budget_cents, reconstruct="bitset")
+            ids = {id(s): i for i, s in enumerate(stocks)}
+            return [ids[id(s)] for s in selection]
+
+        order = list(range(len(stocks)))
+        if previous is not None:
+            # les lignes modifiées depuis l'ancienne base en dernier : les re-tarifer reste local
+            stable = [i for i, k in enumerate(_keys(stocks)) if previous.unchanged(k, stocks[i])]
+            moved = set(stable)
+            order = stable + [i for i in order if i not in moved]
+        base = _Base([stocks[i] for i in order], budget_cents, self.checkpoint_every)
+        self.bases[(dataset, budget_cents)] = base
+        self.bases.move_to_end((dataset, budget_cents))
+        if len(self.bases) > self.max_bases:
+            self.bases.popitem(last=False)
+
+        w = int(np.argmax(base.full_row))
+        selected = []
+        for pos in range(len(stocks) - 1, -1, -1):
+            if _bit(base.fwd_bits[pos], w):
+                selected.append(order[pos])
+                w -= stocks[order[pos]]["cost_cents"]
+        return sorted(selected)
+
+    def _incremental(self, base: _Base, stocks: List[Dict], budget_cents: int):
+        """Re-résout à partir de la base, qui avance sur le résultat ; None si le changement est trop large."""
+        new_keys = _keys(stocks)
+        new_index = {k: i for i, k in enumerate(new_keys)}
+        # positions stables de la base supprimées ou re-tarifées
+        changed = [pos for pos, k in enumerate(base.keys) if k not in new_index or not base.unchanged(k, stocks[new_index[k]])]
+        hot_keys = set(base.hot)
+        added = [k for k in new_keys if k not in base.position and k not in hot_keys]
+
+        n = len(base.stocks)
+        fwd_end, bwd_start = base.fwd_end, base.bwd_start
+        if changed:
+            a, b = min(changed[0], fwd_end), max(changed[-1] + 1, bwd_start)
+        elif bwd_start <= fwd_end:
+            a = b = fwd_end
+        else:
+            a, b = fwd_end, bwd_start  # lignes stables dont aucune couche n'est à jour
+        changed_set = set(changed)
+        kept = [pos for pos in range(a, b) if pos not in changed_set]
+        hot = [base.keys[pos] for pos in changed if base.keys[pos] in new_index]
+        hot += [k for k in base.hot if k in new_index] + added
+        # articles rejoués : les lignes stables inchangées de [a, b), puis les lignes chaudes
+        middle = [new_index[base.keys[pos]] for pos in kept] + [new_index[k] for k in hot]
+        if len(middle) > max(1, self.max_change_ratio * len(stocks)):
+            return None
+
+        prefix, replayed_prefix = base.prefix_row(a)
+        suffix, replayed_suffix = base.suffix_row(b)
+        dp = prefix
+        middle_bits = []
+        kept_rows = {}
+        for j, i in enumerate(middle):
+            middle_bits.append(_step(dp, stocks[i]["cost_cents"], stocks[i]["profit_cents"]))
+            if j < len(kept) and (a + j + 1) % base.every == 0:
+                kept_rows[a + j + 1] = dp.copy()
+            if j + 1 == len(kept):
+                kept_rows[a + j + 1] = dp.copy()
+        self.stats["incremental"] += 1
+        self.stats["recomputed_items"] += replayed_prefix + replayed_suffix + len(middle)
+
+        best = int(np.max(dp + suffix[::-1]))
+        # plus petit budget atteignant l'optimum, comme le premier argmax d'une résolution à froid
+        lo, hi = 0, budget_cents
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if int(np.max(dp[:mid + 1] + suffix[mid::-1])) == best:
+                hi = mid
+            else:
+                lo = mid + 1
+        w_left = int(np.argmax(dp[:lo + 1] + suffix[lo::-1]))
+        w_right = lo - w_left
+
+        selected = []
+        w = w_right
+        for pos in range(b, n):
+            if _bit(base.bwd_bits[pos], w):
+                selected.append(new_index[base.keys[pos]])
+                w -= base.stocks[pos]["cost_cents"]
+        w = w_left
+        for k in range(len(middle) - 1, -1, -1):
+            if _bit(middle_bits[k], w):
+                selected.append(middle[k])
+                w -= stocks[middle[k]]["cost_cents"]
+        for pos in range(a - 1, -1, -1):
+            if _bit(base.fwd_bits[pos], w):
+                selected.append(new_index[base.keys[pos]])
+                w -= base.stocks[pos]["cost_cents"]
+
+        if changed or kept:
+            base.rebase(a, b, kept, middle_bits[:len(kept)], kept_rows, suffix)
+        base.hot = hot
+        return sorted(selected)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Chargement CSV commun
+---------------------
+Un seul lecteur pour optimized.py, bruteforce.py, bruteforcev2.py et
+comparison_results.py. Les colonnes sont reconnues une fois à partir de
+l'en-tête, puis chaque ligne est lue avec csv.reader (pas de dict par ligne)
+dans des tableaux colonnes compacts :
+
+- names         : list[str]
+- cost_cents    : array('q')  coût en centimes
+- profit_cents  : array('q')  profit après 2 ans en centimes
+- percent       : array('d')  rendement en %
+
+La colonne bénéfice est un pourcentage du coût (ex. Share-GRUT : 498.76 € à
+39.42 % = 196.61 € dans le portefeuille de référence de Sienna), sauf si son
+en-tête indique des euros ("€", "euro") ou si unit="euros" est demandé.
+
+Les lignes invalides (valeurs manquantes, coût <= 0, profit <= 0) sont ignorées.
+iter_chunks lit le fichier par blocs pour les très gros fichiers.
+"""
+
+import csv
+from array import array
+from math import isfinite
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Tuple
+
+# À incrémenter dès que le résultat du parsing peut changer (clé de cache)
+PARSER_VERSION = 1
+
+NAME_KEYS = ["action", "titre", "name"]
+COST_KEYS = ["coût", "cout", "price", "prix"]
+PROFIT_KEYS = ["bénéfice", "benefice", "profit", "return"]
+UNITS = ("auto", "percent", "euros")
+
+class StockColumns(NamedTuple):
+    names: List[str]
+    cost_cents: array
+    profit_cents: array
+    percent: array
+
+def parse_float(value: str) -> float:
+    """Convertit une chaîne en float en gérant €, %, espaces, et virgule décimale."""
+    if value is None:
+        raise ValueError("Valeur manquante")
+    s = str(value).strip()
+    s = s.replace("€", "").replace("%", "").replace(" ", "").replace("\u00A0", "")
+    s = s.replace(",", ".")
+    if s == "":
+        raise ValueError("Valeur vide")
+    return float(s)
+
+def _find_column(header: List[str], targets: List[str]) -> int:
+    for idx, k in enumerate(header):
+        kl = k.lower().strip()
+        for t in targets:
+            if t in kl:
+                return idx
+    raise KeyError(f"Colonne manquante: {targets} parmi {header}")
+
+def detect_columns(header: List[str], unit: str = "auto") -> Tuple[int, int, int, str]:
+    """Renvoie (indice nom, indice coût, indice bénéfice, unité du bénéfice)."""
+    if unit not in UNITS:
+        raise ValueError(f"unité inconnue: {unit} (attendu: {', '.join(UNITS)})")
+    name_idx = _find_column(header, NAME_KEYS)
+    cost_idx = _find_column(header, COST_KEYS)
+    profit_idx = _find_column(header, PROFIT_KEYS)
+    if unit == "auto":
+        profit_header = header[profit_idx].lower()
+        unit = "euros" if "€" in profit_header or "euro" in profit_header else "percent"
+    return name_idx, cost_idx, profit_idx, unit
+
+def _empty() -> StockColumns:
+    return StockColumns([], array("q"), array("q"), array("d"))
+
+def iter_chunks(csv_path: Path, chunk_size: int = 65536, unit: str = "auto") -> Iterator[StockColumns]:
+    """Lit le CSV par blocs d'au plus chunk_size actions valides."""
+    with Path(csv_path).open(newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        name_idx, cost_idx, profit_idx, unit = detect_columns(header, unit)
+        width = max(name_idx, cost_idx, profit_idx) + 1
+        as_percent = unit == "percent"
+
+        chunk = _empty()
+        names, costs, profits, percents = chunk
+        for row in reader:
+            if len(row) < width:
+                continue
+            raw_cost, raw_profit = row[cost_idx], row[profit_idx]
+            try:
+                # chemin rapide : cellule numérique simple
+                cost = float(raw_cost)
+            except ValueError:
+                try:
+                    cost = parse_float(raw_cost)
+                except ValueError:
+                    continue
+            try:
+                value = float(raw_profit)
+            except ValueError:
+                try:
+                    value = parse_float(raw_profit)
+                except ValueError:
+                    continue
+            if not (cost > 0 and isfinite(cost) and isfinite(value)):
+                continue
+            if as_percent:
+                percent = value
+                profit = cost * (percent / 100.0)
+            else:
+                profit = value
+                percent = profit / cost * 100.0
+            if not profit > 0:
+                continue
+            names.append(row[name_idx].strip())
+            costs.append(int(round(cost * 100)))
+            profits.append(int(round(profit * 100)))
+            percents.append(percent)
+            if len(names) >= chunk_size:
+                yield chunk
+                chunk = _empty()
+                names, costs, profits, percents = chunk
+        if names:
+            yield chunk
+
+def load_columns(csv_path: Path, unit: str = "auto") -> StockColumns:
+    """Charge tout le CSV dans un seul StockColumns."""
+    result = _empty()
+    for chunk in iter_chunks(csv_path, unit=unit):
+        result.names.extend(chunk.names)
+        result.cost_cents.extend(chunk.cost_cents)
+        result.profit_cents.extend(chunk.profit_cents)
+        result.percent.extend(chunk.percent)
+    return result
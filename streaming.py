@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+Résolution exacte hors mémoire (très gros CSV)
+----------------------------------------------
+Pour des millions de lignes, on ne construit ni dicts ni noms en mémoire :
+
+1. le CSV est lu par blocs (stock_loader.iter_chunks) ; coûts et profits en
+   centimes partent dans un fichier de débordement (spill) binaire, les noms
+   dans un second fichier, une ligne par action ;
+2. le spill est relu en memmap : tri par rendement profit/coût, article de
+   rupture et borne de la relaxation LP (Dantzig) ;
+3. une borne inférieure est obtenue en résolvant exactement par DP une petite
+   fenêtre autour de l'article de rupture (les actions avant la fenêtre sont
+   prises) ;
+4. fixation par coût réduit (Dembo-Hammer) : si forcer une action à l'inverse
+   de la relaxation LP fait passer la borne sous la borne inférieure, toute
+   solution optimale la garde telle quelle. Les actions restantes forment le
+   « noyau », résolu exactement par la DP numpy (Hirschberg si les bits de
+   décision dépassent memory_limit) ;
+5. les noms des actions choisies sont relus en une passe sur le spill des noms.
+
+Si la solution de la fenêtre atteint déjà la borne LP, elle est optimale et
+renvoyée sans DP du noyau.
+
+Mémoire : les colonnes coûtent quelques tableaux numpy de 8 octets par ligne
+(environ 60 octets par ligne, soit ~600 Mo pour 10 millions) et non des
+chaînes Python. S'y ajoute la DP du noyau, sur des tableaux numpy : n_noyau x
+budget / 8 octets de bits de décision, ou O(budget) en Hirschberg au-delà de
+memory_limit ; son temps est proportionnel à n_noyau x budget. La fixation ne
+garantit pas un petit noyau : quand beaucoup de rendements sont égaux à celui
+de l'article de rupture (prix en euros ronds au même %), presque rien n'est
+fixé et le noyau peut être toute l'entrée, sauf si la fenêtre prouve déjà
+l'optimalité. Le profit est exactement optimal ; entre plusieurs optimums, la
+sélection peut différer de celle de la DP complète.
+"""
+
+import tempfile
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+
+from stock_loader import iter_chunks
+
+DEFAULT_MEMORY_LIMIT = 512 * 1024 * 1024
+WINDOW_CELLS = 2 * 10 ** 8  # taille max (articles x budget) de la DP de la fenêtre
+
+def _spill(csv_path: Path, spill_dir: Path, unit: str, chunk_size: int):
+    """Écrit coûts/profits (int64 entrelacés) et noms ; renvoie (chemins, n)."""
+    numbers = spill_dir / "numbers.bin"
+    names = spill_dir / "names.txt"
+    n = 0
+    with numbers.open("wb") as fnum, names.open("w", encoding="utf-8", newline="\n") as fname:
+        for chunk in iter_chunks(csv_path, chunk_size=chunk_size, unit=unit):
+            block = np.empty((len(chunk.names), 2), dtype=np.int64)
+            block[:, 0] = np.frombuffer(chunk.cost_cents, dtype=np.int64)
+            block[:, 1] = np.frombuffer(chunk.profit_cents, dtype=np.int64)
+            block.tofile(fnum)
+            fname.write("\n".join(name.replace("\n", " ") for name in chunk.names))
+            fname.write("\n")
+            n += len(chunk.names)
+    return numbers, names, n
+
+def _read_names(names_path: Path, rows) -> Dict[int, str]:
+    wanted = set(int(r) for r in rows)
+    found = {}
+    with names_path.open(encoding="utf-8", newline="\n") as f:
+        for row, line in enumerate(f):
+            if row in wanted:
+                found[row] = line.rstrip("\n")
+                if len(found) == len(wanted):
+                    break
+    return found
+
+def _profile(costs, profits, capacity: int):
+    """Meilleur profit pour chaque budget 0..capacity (coût <= w), une seule ligne."""
+    dp = np.zeros(capacity + 1, dtype=np.int64)
+    for c, p in zip(costs.tolist(), profits.tolist()):
+        if c > capacity:
+            continue
+        if c == 0:
+            dp += p
+        else:
+            np.maximum(dp[c:], dp[:-c] + p, out=dp[c:])
+    return dp
+
+def _hirschberg(costs, profits, offset: int, capacity: int, chosen) -> None:
+    """Ajoute à chosen les indices (décalés de offset) d'une sélection optimale au budget capacity."""
+    if len(costs) == 1:
+        if costs[0] <= capacity:
+            chosen.append(offset)
+        return
+    mid = len(costs) // 2
+    left = _profile(costs[:mid], profits[:mid], capacity)
+    right = _profile(costs[mid:], profits[mid:], capacity)
+    split = int(np.argmax(left + right[::-1]))
+    del left, right
+    _hirschberg(costs[:mid], profits[:mid], offset, split, chosen)
+    _hirschberg(costs[mid:], profits[mid:], offset + mid, capacity - split, chosen)
+
+def _solve_dp(costs, profits, budget_cents: int, memory_limit: int):
+    """Indices (dans costs) d'une sélection optimale et son profit, sur les tableaux numpy.
+
+    Bits de décision compactés si n x budget / 8 tient dans memory_limit, sinon
+    reconstruction Hirschberg (lignes DP de budget_cents + 1 valeurs seulement).
+    """
+    costs = np.asarray(costs, dtype=np.int64)
+    profits = np.asarray(profits, dtype=np.int64)
+    if not len(costs):
+        return [], 0
+    width = budget_cents + 1
+    if len(costs) * width / 8 > memory_limit:
+        dp = _profile(costs, profits, budget_cents)
+        best_w = int(np.argmax(dp))
+        del dp
+        picked = []
+        _hirschberg(costs, profits, 0, best_w, picked)
+        picked.sort()
+        return picked, int(profits[picked].sum())
+
+    dp = np.zeros(width, dtype=np.int64)
+    masks = []
+    for c, p in zip(costs.tolist(), profits.tolist()):
+        if c > budget_cents:
+            masks.append(None)
+            continue
+        take = np.zeros(width, dtype=bool)
+        if c == 0:
+            dp += p
+            take[:] = True
+        else:
+            candidate = dp[:-c] + p
+            better = candidate > dp[c:]
+            dp[c:] = np.where(better, candidate, dp[c:])
+            take[c:] = better
+        masks.append(np.packbits(take))
+    w = int(np.argmax(dp))
+    profit = int(dp[w])
+    picked = []
+    for i in range(len(masks) - 1, -1, -1):
+        if masks[i] is not None and (masks[i][w >> 3] >> (7 - (w & 7))) & 1:
+            picked.append(i)
+            w -= int(costs[i])
+    return picked[::-1], profit
+
+def _core_solve(cost, profit, budget_cents: int, memory_limit: int, window: int):
+    """Étapes 2 à 4 sur les colonnes (memmap) ; renvoie (lignes choisies, borne LP, borne inf., stats)."""
+    candidates = np.flatnonzero(cost <= budget_cents)
+    ratio = profit[candidates] / cost[candidates]
+    order = candidates[np.argsort(-ratio, kind="stable")]
+    del ratio
+    m = len(order)
+    prefix_cost = np.concatenate(([0], np.cumsum(cost[order])))
+    prefix_profit = np.concatenate(([0], np.cumsum(profit[order])))
+    b = int(np.searchsorted(prefix_cost, budget_cents, side="right")) - 1  # les articles [0, b) tiennent
+    if b >= m:
+        total = int(prefix_profit[m])
+        return order, total, total, {"fixed_in": m, "fixed_out": len(cost) - m, "core": 0}
+
+    r_star = int(profit[order[b]]) / int(cost[order[b]])
+    upper_real = int(prefix_profit[b]) + (budget_cents - int(prefix_cost[b])) * r_star
+
+    # borne inférieure : fenêtre autour de la rupture résolue exactement, le préfixe étant pris
+    lo, hi = max(0, b - window), min(m, b + window)
+    while hi - lo > 2 and (hi - lo) * (budget_cents - int(prefix_cost[lo]) + 1) > WINDOW_CELLS:
+        lo, hi = lo + (b - lo) // 2, hi - (hi - b) // 2
+    rows = order[lo:hi]
+    window_picked, window_profit = _solve_dp(cost[rows], profit[rows], budget_cents - int(prefix_cost[lo]), memory_limit)
+    lower = int(prefix_profit[lo]) + window_profit
+    del prefix_cost, prefix_profit
+    if lower >= int(upper_real):
+        # profits entiers : la fenêtre atteint la borne LP, elle est optimale (pas de noyau)
+        chosen = np.concatenate((order[:lo], rows[window_picked]))
+        return chosen, int(upper_real), lower, {"fixed_in": lo, "fixed_out": len(cost) - len(chosen), "core": 0}
+
+    # forcer x_j à l'inverse de la relaxation LP coûte au moins |p_j - r* c_j| sur la borne
+    slack = np.abs(profit[order] - r_star * cost[order])
+    margin = 1e-9 * upper_real + 1e-6  # arrondis flottants : on ne fixe que les cas nets
+    fixed = upper_real - slack < lower - margin
+    del slack
+    fixed_in_rows = order[:b][fixed[:b]]  # avant la rupture : x = 1 dans la relaxation LP
+    core_rows = order[~fixed]
+    residual = budget_cents - int(cost[fixed_in_rows].sum())
+    picked, _ = _solve_dp(cost[core_rows], profit[core_rows], residual, memory_limit)
+    chosen = np.concatenate((fixed_in_rows, core_rows[picked]))
+    stats = {"fixed_in": len(fixed_in_rows), "fixed_out": len(cost) - len(fixed_in_rows) - len(core_rows),
+             "core": len(core_rows)}
+    return chosen, int(upper_real), lower, stats
+
+def solve_streaming(csv_path: Path, budget_cents: int, unit: str = "auto", chunk_size: int = 1 << 18,
+                    spill_dir: Path = None, memory_limit: int = DEFAULT_MEMORY_LIMIT, window: int = 1000,
+                    profiler=None) -> Dict:
+    """Résolution exacte d'un CSV arbitrairement grand (voir le module).
+
+    Renvoie un dict : selection (dicts au format de optimized.load_stocks, plus row =
+    indice de la ligne valide), cost_cents, profit_cents, upper_bound (borne LP) et
+    stats (lignes, fixées dedans/dehors, taille du noyau, borne inférieure de la
+    fenêtre). profiler (optionnel) chronomètre les phases load, search et reconstruct.
+    """
+    phase = profiler.phase if profiler is not None else (lambda name: nullcontext())
+    with tempfile.TemporaryDirectory(dir=spill_dir, prefix="stock_spill_") as tmp:
+        with phase("load"):
+            numbers_path, names_path, n = _spill(Path(csv_path), Path(tmp), unit, chunk_size)
+        chosen, upper, lower, stats = np.zeros(0, dtype=np.int64), 0, 0, {"fixed_in": 0, "fixed_out": 0, "core": 0}
+        if n:
+            with phase("search"):
+                data = np.memmap(numbers_path, dtype=np.int64, mode="r", shape=(n, 2))
+                chosen, upper, lower, stats = _core_solve(data[:, 0], data[:, 1], budget_cents, memory_limit, window)
+                chosen = np.sort(chosen)
+                picked = np.array(data[chosen])  # copie : le memmap doit être fermé avant le nettoyage
+                del data
+        with phase("reconstruct"):
+            names = _read_names(names_path, chosen)
+            selection = [
+                {
+                    "name": names[int(row)],
+                    "row": int(row),
+                    "cost_eur": int(c) / 100,
+                    "cost_cents": int(c),
+                    "percent": int(p) / int(c) * 100.0,
+                    "profit_eur": int(p) / 100,
+                    "profit_cents": int(p),
+                }
+                for row, (c, p) in zip(chosen, picked)
+            ] if n else []
+    cost_cents = sum(s["cost_cents"] for s in selection)
+    profit_cents = sum(s["profit_cents"] for s in selection)
+    return {
+        "selection": selection,
+        "cost_cents": cost_cents,
+        "profit_cents": profit_cents,
+        "upper_bound": max(upper, profit_cents),
+        "stats": dict(stats, rows=n, lower_bound=lower),
+    }
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Stress-test de portefeuilles par scénarios
+------------------------------------------
+Le rendement du CSV (bénéfice après 2 ans) est une estimation ponctuelle. Ce
+module tire une matrice scénarios x actions de rendements en un seul lot
+NumPy et évalue tous les portefeuilles d'un coup par produit matriciel :
+
+    profits (N x P) = rendements (N x m) @ montants investis (m x P)
+
+Seules les m actions détenues par au moins un portefeuille (choix de la DP,
+alternatives du top-k, référence de Sienna) sont tirées, la matrice reste
+donc petite même pour 100 000 scénarios.
+
+Modèle : r = rendement CSV + volatilité * |rendement CSV| * (sqrt(ρ) Z + sqrt(1 - ρ) E)
+avec Z un facteur de marché commun au scénario et E un bruit propre à chaque
+action (lois normales). Des chocs historiques (en points de %) peuvent
+remplacer le facteur de marché : le scénario i applique alors le choc i à
+toutes les actions, en plus du bruit propre.
+"""
+
+from typing import Dict, Hashable, List, Sequence
+
+import numpy as np
+
+QUANTILES = (0.01, 0.05, 0.5, 0.95, 0.99)
+
+def scenario_returns(percent: Sequence[float], n_scenarios: int, seed: int = None, volatility: float = 0.5,
+                     correlation: float = 0.3, shocks: Sequence[float] = None) -> np.ndarray:
+    """Matrice (n_scenarios x len(percent)) de rendements en fraction du coût.
+
+    Avec shocks, n_scenarios vaut len(shocks) et le facteur de marché est remplacé
+    par les chocs (en %).
+    """
+    if not 0 <= correlation <= 1:
+        raise ValueError(f"la corrélation doit être entre 0 et 1, pas {correlation}")
+    rng = np.random.default_rng(seed)
+    mu = np.asarray(percent, dtype=np.float64) / 100.0
+    sigma = volatility * np.abs(mu)
+    if shocks is not None:
+        shocks = np.asarray(shocks, dtype=np.float64) / 100.0
+        n_scenarios = len(shocks)
+    noise = rng.standard_normal((n_scenarios, len(mu)))
+    if shocks is not None:
+        return mu + shocks[:, None] + sigma * noise
+    market = rng.standard_normal((n_scenarios, 1))
+    return mu + sigma * (np.sqrt(correlation) * market + np.sqrt(1.0 - correlation) * noise)
+
+def _holdings(portfolios: List[Dict[Hashable, float]]):
+    """(clés des lignes détenues, matrice m x P des montants investis en €)."""
+    keys = sorted({key for p in portfolios for key in p})
+    index = {key: i for i, key in enumerate(keys)}
+    amounts = np.zeros((len(keys), len(portfolios)))
+    for j, p in enumerate(portfolios):
+        for key, euros in p.items():
+            amounts[index[key], j] += euros
+    return keys, amounts
+
+def stress_portfolios(portfolios: List[Dict[Hashable, float]], percent_of: Dict[Hashable, float], n_scenarios: int = 10000,
+                      seed: int = None, volatility: float = 0.5, correlation: float = 0.3,
+                      shocks: Sequence[float] = None, reference: int = None, chunk: int = 250000) -> List[Dict]:
+    """Distribution du profit (€) de chaque portefeuille sur les mêmes scénarios.
+
+    portfolios : liste de {clé de ligne: montant investi en €}, la clé (indice de
+    ligne du CSV par exemple) distinguant deux actions de même nom ; percent_of
+    donne le rendement CSV (%) de chaque clé. reference est l'indice du
+    portefeuille à battre (Sienna) : chaque résultat contient alors la
+    probabilité de faire mieux que lui dans un même scénario. Les scénarios sont
+    tirés par blocs de chunk lignes (mémoire bornée), les statistiques portent
+    sur l'ensemble.
+    """
+    keys, amounts = _holdings(portfolios)
+    percent = [percent_of[key] for key in keys]
+    if shocks is not None:
+        n_scenarios = len(shocks)
+    profits = np.empty((n_scenarios, len(portfolios)))
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_scenarios, chunk):
+        stop = min(n_scenarios, start + chunk)
+        block_shocks = None if shocks is None else np.asarray(shocks)[start:stop]
+        returns = scenario_returns(percent, stop - start, rng.integers(2 ** 63), volatility, correlation, block_shocks)
+        profits[start:stop] = returns @ amounts
+
+    levels = np.quantile(profits, QUANTILES, axis=0)
+    q05 = levels[QUANTILES.index(0.05)]
+    tail = profits <= q05
+    expected_shortfall = -(profits * tail).sum(axis=0) / np.maximum(tail.sum(axis=0), 1)
+    beats = (profits > profits[:, [reference]]).mean(axis=0) if reference is not None else None
+    results = []
+    for j in range(len(portfolios)):
+        r = {
+            "invested_eur": float(amounts[:, j].sum()),
+            "mean_eur": float(profits[:, j].mean()),
+            "std_eur": float(profits[:, j].std()),
+            "quantiles_eur": {f"q{int(q * 100):02d}": float(levels[k, j]) for k, q in enumerate(QUANTILES)},
+            "var95_eur": float(-q05[j]),
+            "es95_eur": float(expected_shortfall[j]),
+            "prob_loss": float((profits[:, j] < 0).mean()),
+        }
+        if beats is not None:
+            r["prob_beat_reference"] = float(beats[j])
+        results.append(r)
+    return results
+
+def format_stress(labels: List[str], results: List[Dict], n_scenarios: int) -> str:
+    lines = [f"--- Stress test ({n_scenarios} scénarios) ---",
+             f"{'portefeuille':<14}{'moyenne':>10}{'écart-type':>11}{'q05':>10}{'q50':>10}{'q95':>10}"
+             f"{'VaR95':>10}{'ES95':>10}{'P(perte)':>9}{'P(>Sienna)':>11}"]
+    for label, r in zip(labels, results):
+        q = r["quantiles_eur"]
+        beat = f"{r['prob_beat_reference']:.1%}" if "prob_beat_reference" in r else "-"
+        lines.append(f"{label:<14}{r['mean_eur']:>10.2f}{r['std_eur']:>11.2f}{q['q05']:>10.2f}{q['q50']:>10.2f}"
+                     f"{q['q95']:>10.2f}{r['var95_eur']:>10.2f}{r['es95_eur']:>10.2f}{r['prob_loss']:>9.1%}{beat:>11}")
+    return "\n".join(lines)